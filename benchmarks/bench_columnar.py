@@ -0,0 +1,113 @@
+# Dashboard aggregations: SQLite (rollup tables) versus the columnar engine
+# (columnar.py), loaded from SQLite (memory) or memory-mapped from the Arrow
+# snapshot (arrow), on synthetic databases of increasing size.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_columnar [--sizes 10000,1000000,10000000] [--repeat N]
+#
+# For every size a synthetic database is written to a temporary directory by
+# data/db_synth.py, with its snapshot; every backend then answers every filter
+# combination of the four charts and the results are checked for equality.
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+import db_service
+from benchmarks.synthetic import build_database, filter_values, use_database
+from columnar import ColumnarStore, FACT_COLUMNS
+
+# The four charts over every filter combination, for one backend
+def chart_jobs(sql, store, years, countries):
+    jobs = []
+    for year in [None] + years:
+        jobs.append(('global_revenue',
+                     # prev_revenue is all NULL for the first year, which pandas reads as object
+                     lambda y=year: sql('get_global_revenue.sql', year=y).astype({'prev_revenue': float}),
+                     lambda y=year: store.global_revenue(y)))
+    for year in [None] + years:
+        for country in [None] + countries:
+            jobs.append(('customer_matrix',
+                         lambda y=year, c=country: sql('get_customer_matrix.sql', year=y, country=c),
+                         lambda y=year, c=country: store.customer_matrix(y, c)))
+    for country in [None] + countries:
+        jobs.append(('product_performance',
+                     lambda c=country: sql('get_product_performance.sql', country=c),
+                     lambda c=country: store.product_performance(c)))
+        jobs.append(('product_drilldown',
+                     lambda c=country: sql('get_product_drilldown.sql', country=c),
+                     lambda c=country: store.product_performance(c, 'product')))
+        jobs.append(('service_quality',
+                     lambda c=country: sql('get_service_quality.sql', country=c),
+                     lambda c=country: store.service_quality(c)))
+    # Quarterly buckets, for long ranges (see timeseries.py)
+    for country in [None] + countries:
+        jobs.append(('matrix_by_quarter',
+                     lambda c=country: sql('get_customer_matrix_quarterly.sql', country=c),
+                     lambda c=country: store.customer_matrix(None, c, months=3)))
+        jobs.append(('service_by_quarter',
+                     lambda c=country: sql('get_service_quality_quarterly.sql', country=c),
+                     lambda c=country: store.service_quality(c, months=3)))
+    return jobs
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def run_size(n_items, repeat, workdir):
+    path = os.path.join(workdir, f"synthetic_{n_items}.db")
+    started = time.perf_counter()
+    build_database(path, n_items, snapshot=True)
+    print(f"\n{n_items:,} items: database built in {time.perf_counter() - started:.1f}s")
+
+    use_database(path)
+
+    load_seconds, store = timed(ColumnarStore.from_sqlite, 1)
+    size_mb = sum(getattr(store, name).nbytes for name in FACT_COLUMNS) / 2 ** 20
+    print(f"  columnar store loaded in {load_seconds:.2f}s ({size_mb:.0f} MB per worker)")
+    map_seconds, mapped = timed(lambda: ColumnarStore.from_snapshot(db_service.snapshot_path()), 1)
+    print(f"  snapshot mapped in {map_seconds:.2f}s (shared page cache)")
+
+    years, countries = filter_values()
+    totals = {}
+    jobs = zip(chart_jobs(db_service.read_query, store, years, countries),
+               chart_jobs(db_service.read_query, mapped, years, countries))
+    for (chart, sql_job, memory_job), (_, _, arrow_job) in jobs:
+        total = totals.setdefault(chart, [0.0, 0.0, 0.0, 0])
+        seconds, expected = timed(sql_job, repeat)
+        total[0] += seconds
+        for i, job in ((1, memory_job), (2, arrow_job)):
+            seconds, actual = timed(job, repeat)
+            pd.testing.assert_frame_equal(expected, actual, check_dtype=False)
+            total[i] += seconds
+        total[3] += 1
+
+    print(f"  {'chart':<22}{'sqlite ms':>12}{'memory ms':>12}{'arrow ms':>12}")
+    for chart, (*seconds, count) in totals.items():
+        print(f"  {chart:<22}" + ''.join(f"{s / count * 1000:>12.2f}" for s in seconds))
+    db_service.pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the SQLite and in-memory columnar backends.")
+    parser.add_argument('--sizes', default='10000,1000000,10000000', help="comma-separated item row counts")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per query (default: 5)")
+    args = parser.parse_args()
+
+    db_service.load_queries()
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes.split(','):
+            run_size(int(size), args.repeat, workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+# Latency of every visual.py function and main.py callback over all filter
+# combinations, on synthetic databases of increasing size.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_dashboard [--sizes 10000,100000,1000000] [--repeat N]
+#                                        [--output results.json] [--compare baseline.json]
+#
+# Every call is split into phases:
+#   sql     visual.fetch_data and pandas.read_sql_query (the query, or the columnar
+#           store with DASHBOARD_BACKEND=memory)
+#   figure  the render.py renderers and figure_patch
+#   pandas  everything else inside the function (DataFrame work, classification, ...)
+#   json    serializing the return value with the encoder Dash uses for responses
+# The figure cache is bypassed. Callbacks run as a dropdown change after the
+# first load, i.e. with the "*-sent" stores set, so they answer with Patches.
+# Peak memory is the largest tracemalloc peak of one call, from a separate pass.
+# Results are written as JSON; --compare reports p50/p95 regressions against an
+# earlier run and exits with status 1 if there are any.
+import argparse
+import functools
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from dash._utils import to_json
+
+import db_service
+import visual
+from benchmarks.synthetic import build_database, use_database
+from warmup import filter_combinations, PRODUCT_LEVELS
+
+PHASES = ('sql', 'pandas', 'figure', 'json')
+PERCENTILES = (50, 95, 99)
+
+
+# Adds the time spent in wrapped functions to the phase totals of the running
+# call; a wrapped function called inside another of the same phase counts once
+class PhaseTimer:
+    def __init__(self):
+        self.current = None
+        self.active = set()
+
+    def wrap(self, phase, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            if phase in self.active:
+                return func(*args, **kwargs)
+            self.active.add(phase)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.active.discard(phase)
+                if self.current is not None:
+                    self.current[phase] += time.perf_counter() - started
+        return timed
+
+    # One call: (seconds per phase plus 'total', JSON payload bytes)
+    def run(self, func, args):
+        self.current = {'sql': 0.0, 'figure': 0.0}
+        started = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - started
+        phases, self.current = self.current, None
+
+        started = time.perf_counter()
+        payload = to_json(result)
+        phases['json'] = time.perf_counter() - started
+        phases['pandas'] = seconds - phases['sql'] - phases['figure']
+        phases['total'] = seconds + phases['json']
+        return phases, len(payload)
+
+
+# Route visual.py / main.py through the timer, with the uncached builders
+def instrument(timer, main):
+    patches = [mock.patch.object(visual, 'fetch_data', timer.wrap('sql', visual.fetch_data)),
+               mock.patch.object(pd, 'read_sql_query', timer.wrap('sql', pd.read_sql_query))]
+    for name in dir(visual):
+        if name.startswith('render_'):
+            patches.append(mock.patch.object(visual, name, timer.wrap('figure', getattr(visual, name))))
+    for name in ('figure_patch', 'render_empty'):
+        patches.append(mock.patch.object(main, name, timer.wrap('figure', getattr(main, name))))
+    for name in ('get_global_revenue', 'get_customer_matrix_plot', 'get_product_performance', 'get_service_quality'):
+        patches.append(mock.patch.object(main, name, getattr(visual, name).__wrapped__))
+    # There is no Dash callback context outside a request: update_product_performance
+    # runs as a country change, which rebuilds both Operational tab charts
+    patches.append(mock.patch.object(main, 'ctx', SimpleNamespace(triggered_id='country-filter')))
+    return patches
+
+
+# (name, function, args) for every function and callback over all filter values
+def benchmark_jobs(main, years, countries):
+    # The dropdown options as read from the database (get_year_list / get_country_list are cached)
+    jobs = [('read_filter_options', visual.read_filter_options, ())]
+    for func, args in filter_combinations(years, countries):
+        jobs.append((func.__name__, func.__wrapped__, args))
+
+    for year in years:
+        jobs.append(('update_global_revenue', main.update_global_revenue, (year, True)))
+        for country in countries:
+            jobs.append(('update_customer_matrix', main.update_customer_matrix, (year, country, True)))
+    for country in [None] + countries:
+        for level in PRODUCT_LEVELS:
+            jobs.append(('update_product_performance', main.update_product_performance,
+                         (country, level, True, True)))
+    return jobs
+
+
+def summarize(samples):
+    values = np.array(samples) * 1000
+    return {f"p{q}": round(float(np.percentile(values, q)), 3) for q in PERCENTILES}
+
+
+def run_size(n_items, repeat, workdir):
+    path = os.path.join(workdir, f"synthetic_{n_items}.db")
+    started = time.perf_counter()
+    build_database(path, n_items)
+    print(f"\n{n_items:,} items: database built in {time.perf_counter() - started:.1f}s")
+    use_database(path)
+
+    import main
+    timer = PhaseTimer()
+    jobs = benchmark_jobs(main, visual.get_year_list(), visual.get_country_list())
+
+    samples, payloads, peaks = {}, {}, {}
+    with ExitStack() as stack:
+        for patch in instrument(timer, main):
+            stack.enter_context(patch)
+
+        # Untimed pass: fills the SQLite page cache (and the columnar store)
+        for _, func, args in jobs:
+            timer.run(func, args)
+
+        for _ in range(repeat):
+            for name, func, args in jobs:
+                phases, size = timer.run(func, args)
+                for phase, seconds in phases.items():
+                    samples.setdefault(name, {}).setdefault(phase, []).append(seconds)
+                payloads.setdefault(name, []).append(size)
+
+        tracemalloc.start()
+        for name, func, args in jobs:
+            tracemalloc.reset_peak()
+            timer.run(func, args)
+            peaks[name] = max(peaks.get(name, 0), tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    functions = {}
+    for name, phases in samples.items():
+        functions[name] = {
+            'calls': len(phases['total']) // repeat,
+            'payload_bytes_p50': int(np.percentile(payloads[name], 50)),
+            'peak_alloc_mb': round(peaks[name] / 2 ** 20, 2),
+        }
+        for phase in ('total',) + PHASES:
+            functions[name][phase] = summarize(phases[phase])
+
+    # ru_maxrss is in KiB on Linux; it only grows, so later sizes include earlier ones
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print_size(functions, rss_mb)
+    db_service.pool.close()
+    return {'peak_rss_mb': round(rss_mb, 1), 'functions': functions}
+
+
+def print_size(functions, rss_mb):
+    print(f"  {'function':<28}{'calls':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          + ''.join(f"{phase + ' p50':>12}" for phase in PHASES) + f"{'KB':>8}{'peak MB':>9}")
+    for name, stats in functions.items():
+        total = stats['total']
+        print(f"  {name:<28}{stats['calls']:>6}{total['p50']:>9.2f}{total['p95']:>9.2f}{total['p99']:>9.2f}"
+              + ''.join(f"{stats[phase]['p50']:>12.2f}" for phase in PHASES)
+              + f"{stats['payload_bytes_p50'] / 1024:>8.1f}{stats['peak_alloc_mb']:>9.2f}")
+    print(f"  peak RSS {rss_mb:.0f} MB")
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=db_service.BASE_DIR,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'backend': db_service.DATA_BACKEND,
+        'python': platform.python_version(),
+        'repeat': args.repeat,
+    }
+
+
+# (size, function, percentile, old ms, new ms) where new is slower than old by more than tolerance
+def regressions(old, new, tolerance):
+    found = []
+    for size, results in new['sizes'].items():
+        baseline = old['sizes'].get(size, {}).get('functions', {})
+        for name, stats in results['functions'].items():
+            for q in ('p50', 'p95'):
+                before = baseline.get(name, {}).get('total', {}).get(q)
+                after = stats['total'][q]
+                if before and after > before * (1 + tolerance):
+                    found.append((size, name, q, before, after))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every visual.py function and Dash callback.")
+    parser.add_argument('--sizes', default='10000,100000,1000000', help="comma-separated item row counts")
+    parser.add_argument('--repeat', type=int, default=5, help="timed passes over all combinations (default: 5)")
+    parser.add_argument('--output', default='bench_dashboard.json', help="results file (default: bench_dashboard.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier results file to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown before a p50/p95 counts as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    results = {'meta': metadata(args), 'sizes': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes.split(','):
+            results['sizes'][size] = run_size(int(size), args.repeat, workdir)
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+        found = regressions(baseline, results, args.tolerance)
+        for size, name, q, before, after in found:
+            print(f"  REGRESSION {size} items {name} {q}: {before:.2f} ms -> {after:.2f} ms")
+        print(f"{len(found)} regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+        if found:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
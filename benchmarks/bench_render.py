@@ -0,0 +1,78 @@
+# Per-request CPU time: full plotly figure construction (the old callback path)
+# versus splicing data into the precomputed skeletons from render.py.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_render [--repeat N]
+#
+# Both paths run the same SQL and pandas work and are serialized with the
+# encoder Dash uses for responses; the figure cache is bypassed.
+import argparse
+import statistics
+import time
+from unittest import mock
+
+import render
+import visual
+from visual import get_country_list, get_year_list
+
+
+# Old path: build the go.Figure with plotly express / make_subplots every time
+LEGACY_RENDERERS = {
+    'render_global_revenue': render.build_global_revenue_figure,
+    'render_customer_matrix': render.build_customer_matrix_figure,
+    'render_product_performance': render.build_product_performance_figure,
+    'render_service_quality': render.build_service_quality_figure,
+}
+
+
+def chart_requests():
+    years = get_year_list()
+    countries = get_country_list()
+    requests = {
+        'global_revenue': [(visual.get_global_revenue.__wrapped__, (year,)) for year in years],
+        'customer_matrix': [(visual.get_customer_matrix_plot.__wrapped__, (year, country))
+                            for year in years for country in countries],
+        'product_performance': [(visual.get_product_performance.__wrapped__, (country,)) for country in countries],
+        'service_quality': [(visual.get_service_quality.__wrapped__, (country,)) for country in countries],
+    }
+    return requests
+
+
+# CPU seconds per request (builder + JSON serialization), one sample per call
+def measure(jobs, repeat):
+    samples = []
+    payload_bytes = 0
+    for _ in range(repeat):
+        for func, args in jobs:
+            started = time.process_time()
+            payload = render.figure_to_json(func(*args))
+            samples.append(time.process_time() - started)
+            payload_bytes = max(payload_bytes, len(payload))
+    return samples, payload_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-request CPU time of plotly figure construction and skeleton splicing.")
+    parser.add_argument('--repeat', type=int, default=5, help="passes over every filter combination (default: 5)")
+    args = parser.parse_args()
+
+    requests = chart_requests()
+
+    # Build the skeletons outside the timed region (done once per worker)
+    for chart in ['empty', 'global_revenue', 'customer_matrix', 'product_performance', 'service_quality']:
+        render._skeleton(chart)
+
+    print(f"{'chart':<22}{'plotly ms':>12}{'skeleton ms':>14}{'speed-up':>10}{'max bytes':>12}")
+    for chart, jobs in requests.items():
+        with mock.patch.multiple(visual, **LEGACY_RENDERERS):
+            legacy, legacy_bytes = measure(jobs, args.repeat)
+        spliced, spliced_bytes = measure(jobs, args.repeat)
+
+        legacy_ms = statistics.median(legacy) * 1000
+        spliced_ms = statistics.median(spliced) * 1000
+        print(f"{chart:<22}{legacy_ms:>12.2f}{spliced_ms:>14.2f}{legacy_ms / spliced_ms:>9.1f}x"
+              f"{spliced_bytes:>12}")
+
+
+if __name__ == '__main__':
+    main()
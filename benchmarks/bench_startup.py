@@ -0,0 +1,61 @@
+# Worker start-up cost: imports main (as a gunicorn worker does through wsgi.py)
+# in a fresh interpreter and reports the import time, the peak RSS after the
+# import, the database connections opened during the import, and the time to
+# serve the first page, which reads the dropdown options.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_startup [--db PATH] [--repeat N]
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+import db_service
+
+# Runs in the child: prints one JSON line
+CHILD = """
+import json, resource, sys, time
+import db_service
+from benchmarks.synthetic import use_database
+
+use_database(sys.argv[1])
+opened = []
+open_connection = db_service._open_connection
+db_service._open_connection = lambda database: opened.append(database) or open_connection(database)
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+connections = len(opened)
+with main.app.server.test_request_context('/'):
+    main.app.serve_layout()
+served = time.perf_counter()
+print(json.dumps({'import_s': imported - started, 'rss_mb': rss, 'connections': connections,
+                  'first_page_s': served - imported, 'plotly_express': 'plotly.express' in sys.modules}))
+"""
+
+
+def run_once(db):
+    result = subprocess.run([sys.executable, "-c", CHILD, db], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the start-up cost of a dashboard worker.")
+    parser.add_argument('--db', default=db_service.db_name, help="database to start on (default: the dashboard's)")
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters to start (default: 5)")
+    args = parser.parse_args()
+
+    runs = [run_once(args.db) for _ in range(args.repeat)]
+    median = lambda key: statistics.median(run[key] for run in runs)
+    print(f"{args.db}: {args.repeat} starts")
+    print(f"  import main      {median('import_s') * 1000:>8.0f} ms")
+    print(f"  peak RSS         {median('rss_mb'):>8.0f} MB")
+    print(f"  connections      {median('connections'):>8.0f}    opened during the import")
+    print(f"  first page       {median('first_page_s') * 1000:>8.0f} ms")
+    print(f"  plotly.express   {'loaded' if runs[0]['plotly_express'] else 'not loaded':>8}    after the import")
+
+
+if __name__ == '__main__':
+    main()
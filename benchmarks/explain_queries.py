@@ -0,0 +1,222 @@
+# Query plan inspector for sql/: runs EXPLAIN QUERY PLAN for every query with the
+# filters visual.py uses (each set of filters runs its own variant of the query,
+# see db_service.query_variant), flags plan steps and SQL patterns that do not
+# scale, and times each binding.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.explain_queries [--db PATH] [--sizes 10000,1000000] [--repeat N] [--strict]
+#
+# Without --sizes the dashboard database (or --db) is inspected; with --sizes a
+# synthetic database of each size is built by data/db_synth.py and inspected in
+# turn. --strict exits with status 1 when anything is flagged, for use after
+# editing a .sql file.
+import argparse
+import os
+import re
+import statistics
+import tempfile
+import time
+
+import db_service
+from benchmarks.synthetic import build_database, use_database
+
+
+# Filters per file, as visual.py passes them: label -> filters(year, country)
+COUNTRY_FILTERS = {
+    'all countries': lambda year, country: {'country': None},
+    'one country': lambda year, country: {'country': country},
+}
+MATRIX_FILTERS = {
+    'all years, all countries': lambda year, country: {'year': None, 'country': None},
+    'one year, all countries': lambda year, country: {'year': year, 'country': None},
+    'all years, one country': lambda year, country: {'year': None, 'country': country},
+    'one year, one country': lambda year, country: {'year': year, 'country': country},
+}
+
+
+# A zoomed service quality window: a quarter of the year by day, or the whole year by week
+def zoom_filters(bucket, months, one_country):
+    return lambda year, country: {'bucket': bucket, 'country': country if one_country else None,
+                                  'start_year': year, 'start_month': 1, 'start_day': 1,
+                                  'end_year': year + months // 12, 'end_month': months % 12 + 1, 'end_day': 1}
+
+
+BINDINGS = {
+    'get_global_revenue.sql': {
+        'latest year': lambda year, country: {'year': None},
+        'one year': lambda year, country: {'year': year},
+    },
+    'get_customer_matrix.sql': MATRIX_FILTERS,
+    'get_customer_matrix_quarterly.sql': MATRIX_FILTERS,
+    'get_product_performance.sql': COUNTRY_FILTERS,
+    'get_product_drilldown.sql': COUNTRY_FILTERS,
+    'get_service_quality.sql': COUNTRY_FILTERS,
+    'get_service_quality_quarterly.sql': COUNTRY_FILTERS,
+    'get_service_quality_detail.sql': {
+        'by day, all countries': zoom_filters('day', 3, False),
+        'by day, one country': zoom_filters('day', 3, True),
+        'by week, all countries': zoom_filters('week', 12, False),
+        'by week, one country': zoom_filters('week', 12, True),
+    },
+}
+
+# Tables a query is meant to read in full (the columnar backend loads the whole fact table)
+EXPECTED_SCANS = {
+    'load_fact_table.sql': {'Order_Items', 'Orders', 'Customers', 'Products', 'Reviews'},
+}
+
+# Plan steps that do not scale with the data: (pattern on the plan detail, finding)
+PLAN_RULES = [
+    (re.compile(r"^USE TEMP B-TREE FOR (.+)$"), "temp B-tree for {0}"),
+    (re.compile(r"AUTOMATIC (?:COVERING |PARTIAL )*INDEX"), "automatic index built for this query (missing index)"),
+]
+
+# SQL text that prevents an index seek: (pattern, finding)
+TEXT_RULES = [
+    (re.compile(r"\(\s*(?:\?\d*|:\w+)\s+IS\s+NULL\s+OR\s+([\w.]+)\s*=\s*(?:\?\d*|:\w+)\s*\)", re.IGNORECASE),
+     "non-sargable catch-all predicate on {0} (use an optional '-- if <filter>' line instead)"),
+    (re.compile(r"\b(STRFTIME|DATE|JULIANDAY|LOWER|UPPER|SUBSTR|CAST)\s*\(([^()]*)\)\s*(?:=|<|>|IN\b|BETWEEN\b)",
+                re.IGNORECASE),
+     "function {0}() applied to a column in a comparison"),
+    (re.compile(r"\bLIKE\s+'%", re.IGNORECASE), "LIKE with a leading wildcard"),
+]
+
+TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|INNER\b|CROSS\b|"
+                         r"GROUP\b|ORDER\b|USING\b)(\w+))?", re.IGNORECASE)
+
+
+strip_comments = db_service.strip_sql_comments
+
+
+# (query variant, parameters) for a set of filters; unset parameters are bound to NULL
+def bind(query, filters):
+    variant = db_service.query_variant(
+        query, frozenset(name for name, value in filters.items() if value is not None))
+    text = strip_comments(variant)
+    names = db_service.NAMED_PARAMETER.findall(text)
+    if not names:
+        return variant, (None,) * text.count('?')
+    return variant, {**dict.fromkeys(names), **filters}
+
+
+# alias (or table name) -> table, for the tables in the database
+def table_aliases(query, tables):
+    aliases = {}
+    for table, alias in TABLE_ALIAS.findall(strip_comments(query)):
+        if table in tables:
+            aliases[table] = table
+            if alias:
+                aliases[alias] = table
+    return aliases
+
+
+def text_findings(query):
+    findings = []
+    query = strip_comments(query)
+    for pattern, message in TEXT_RULES:
+        for match in pattern.finditer(query):
+            line = query.count("\n", 0, match.start()) + 1
+            findings.append(f"line {line}: " + message.format(*match.groups()))
+    return findings
+
+
+# [(plan detail, finding or None)] for one binding
+def plan_findings(conn, filename, query, params, tables):
+    aliases = table_aliases(query, tables)
+    expected = EXPECTED_SCANS.get(filename, set())
+    rows = []
+    for _, _, _, detail in conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall():
+        finding = None
+        scan = re.match(r"^SCAN (\w+)(?: USING (COVERING )?INDEX (\w+))?", detail)
+        if scan and scan.group(1) in aliases and aliases[scan.group(1)] not in expected:
+            table = aliases[scan.group(1)]
+            finding = (f"full scan of {table} through index {scan.group(3)}" if scan.group(3)
+                       else f"full table scan of {table}")
+        for pattern, message in PLAN_RULES:
+            match = pattern.search(detail)
+            if match:
+                finding = message.format(*match.groups())
+        rows.append((detail, finding))
+    return rows
+
+
+def time_query(conn, query, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(query, params).fetchall()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+# Representative filter values: the latest year and the country with most customers
+def sample_filters(conn):
+    year = conn.execute("SELECT MAX(order_year) FROM Orders").fetchone()[0]
+    country = conn.execute(
+        "SELECT country FROM Customers GROUP BY country ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+    return year, country
+
+
+# Inspect every sql/ file on the current db_service database; returns the number of findings
+def inspect_database(label, repeat):
+    flagged = 0
+    with db_service.borrow_connection() as conn:
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        items = conn.execute("SELECT COUNT(*) FROM Order_Items").fetchone()[0]
+        year, country = sample_filters(conn)
+        print(f"\n{label}: {items:,} items (year={year}, country={country})")
+
+        for filename in sorted(os.listdir(db_service.sql_path)):
+            if not filename.endswith(".sql"):
+                continue
+            query = db_service.extract_query_from_file(filename)
+            if query is None:
+                continue
+            print(f"\n  {filename}")
+            for finding in text_findings(query):
+                print(f"    ! {finding}")
+                flagged += 1
+
+            # Unknown files: no optional filters, every parameter bound to NULL
+            bindings = BINDINGS.get(filename, {'no filters': lambda year, country: {}})
+            for name, make_filters in bindings.items():
+                variant, params = bind(query, make_filters(year, country))
+                seconds = time_query(conn, variant, params, repeat)
+                print(f"    {name:<28}{seconds * 1000:>10.2f} ms")
+                for detail, finding in plan_findings(conn, filename, variant, params, tables):
+                    if finding:
+                        print(f"      ! {detail:<60} {finding}")
+                        flagged += 1
+                    else:
+                        print(f"        {detail}")
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the query plans of the sql/ directory.")
+    parser.add_argument('--db', default=db_service.db_name, help="database to inspect (default: the dashboard's)")
+    parser.add_argument('--sizes', help="comma-separated item row counts: inspect synthetic databases instead")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per binding (default: 5)")
+    parser.add_argument('--strict', action='store_true', help="exit with status 1 if anything is flagged")
+    args = parser.parse_args()
+
+    flagged = 0
+    if args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            for size in args.sizes.split(','):
+                path = os.path.join(workdir, f"synthetic_{size}.db")
+                build_database(path, int(size))
+                use_database(path)
+                flagged += inspect_database(f"synthetic {int(size):,}", args.repeat)
+    else:
+        use_database(args.db)
+        flagged += inspect_database(args.db, args.repeat)
+    db_service.pool.close()
+
+    print(f"\n{flagged} findings")
+    if args.strict and flagged:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+# Synthetic databases shared by the benchmarks, written by data/db_synth.py in a
+# subprocess so the generator's memory does not count towards the benchmark.
+import os
+import subprocess
+import sys
+
+import db_service
+
+
+# snapshot=True also writes <path>.arrow with data/db_snapshot.py (needs pyarrow);
+# start / end ('YYYY-MM-DD') override the generator's order date range
+def build_database(path, n_items, snapshot=False, start=None, end=None):
+    dates = (['--start', start] if start else []) + (['--end', end] if end else [])
+    subprocess.run([sys.executable, os.path.join(db_service.BASE_DIR, 'data', 'db_synth.py'),
+                    '--rows', str(n_items), '--db', path, *dates], check=True, stdout=subprocess.DEVNULL)
+    if snapshot:
+        subprocess.run([sys.executable, os.path.join(db_service.BASE_DIR, 'data', 'db_snapshot.py'),
+                        '--db', path], check=True, stdout=subprocess.DEVNULL)
+
+
+# Point db_service (pool and fingerprint) at another database file
+def use_database(path):
+    db_service.pool.close()
+    db_service.db_name = path
+    db_service.pool = db_service.ConnectionPool(path)
+
+
+# Years and countries present in the current database, for the filter combinations
+def filter_values():
+    with db_service.borrow_connection() as conn:
+        years = [str(year) for (year,) in conn.execute("SELECT DISTINCT order_year FROM Orders ORDER BY 1")]
+        countries = [country for (country,) in conn.execute("SELECT DISTINCT country FROM Customers ORDER BY 1")]
+    return years, countries
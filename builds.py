@@ -0,0 +1,194 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from dash.exceptions import PreventUpdate
+
+# --- FIGURE BUILDS ---
+# Every figure build (a figure cache miss, see figure_cache.cached_figure) goes
+# through build_pool.run(). Builds are single-flight: while a figure is being
+# built, identical requests (same cache key) wait for that build instead of
+# running their own, e.g. when many people open the dashboard at once and all
+# ask for the default year. The `coalesced` counters show the builds saved.
+#
+# DASH_BACKGROUND_BUILDS=1 also runs the builds in a bounded pool of
+# BUILD_WORKERS threads per worker process instead of in the request thread,
+# so a burst of slow builds cannot take every request thread. Cache hits never
+# wait for the pool. Run gunicorn with --threads so a request waiting for its
+# build does not hold a whole worker.
+BACKGROUND_BUILDS = os.environ.get("DASH_BACKGROUND_BUILDS", "") not in ("", "0")
+BUILD_WORKERS = int(os.environ.get("BUILD_WORKERS", "4"))
+
+
+# Raised in a request that a newer request for the same chart replaced
+class Superseded(Exception):
+    pass
+
+
+class _Job:
+    def __init__(self, key):
+        self.key = key
+        self.future = None
+        self.waiters = 0
+
+
+# One callback request: the build it waits on, if any
+class _Request:
+    def __init__(self):
+        self.job = None
+        self.event = None
+        self.superseded = False
+
+
+# The callback request running in this context, see BuildPool.request()
+_current = contextvars.ContextVar('build_request', default=None)
+
+
+# Single-flight figure builds, optionally in a bounded thread pool. In the pool,
+# a request from a browser tab replaces the earlier request from that tab for
+# the same chart: the earlier one stops waiting and answers PreventUpdate, and
+# its build is cancelled if it has not started and nobody else waits for it.
+# Threads rather than processes: figures, the figure cache and the connection
+# pool live in the worker process, and SQLite and NumPy release the GIL.
+class BuildPool:
+    def __init__(self, workers=BUILD_WORKERS, enabled=BACKGROUND_BUILDS):
+        self.workers = workers
+        self.enabled = enabled
+        # Re-entrant: cancelling a future runs its done callbacks in this thread
+        self._lock = threading.RLock()
+        self._reset()
+        self.stats = {'computed': 0, 'coalesced': 0, 'superseded': 0, 'cancelled': 0}
+        self.coalesced_by_builder = {}   # builder name -> builds saved
+
+    # The executor is created on first use, and again in a forked child
+    def _reset(self):
+        self._pid = os.getpid()
+        self._executor = None
+        self._jobs = {}      # cache key -> _Job in flight
+        self._latest = {}    # (session, slot) -> latest _Request
+
+    def _get_executor(self):
+        if self._pid != os.getpid():
+            self._reset()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='build')
+        return self._executor
+
+    # `with build_pool.request(session_id, 'chart'):` around a callback body.
+    # Without a session id (or with background builds off) nothing is superseded.
+    @contextmanager
+    def request(self, session, slot):
+        if not self.enabled or session is None:
+            yield
+            return
+        current = _Request()
+        with self._lock:
+            previous = self._latest.get((session, slot))
+            self._latest[(session, slot)] = current
+            if previous is not None:
+                self._supersede(previous)
+        token = _current.set(current)
+        try:
+            yield
+        except Superseded:
+            raise PreventUpdate
+        finally:
+            _current.reset(token)
+            with self._lock:
+                if self._latest.get((session, slot)) is current:
+                    del self._latest[(session, slot)]
+
+    def _supersede(self, request):
+        request.superseded = True
+        self.stats['superseded'] += 1
+        job = request.job
+        if job is None:
+            return
+        request.job = None
+        job.waiters -= 1
+        if job.waiters == 0 and job.future.cancel():
+            self.stats['cancelled'] += 1
+        request.event.set()
+
+    def _finished(self, job):
+        with self._lock:
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+
+    # An identical build is already in flight: count the saved build
+    def _coalesce(self, key):
+        self.stats['coalesced'] += 1
+        self.coalesced_by_builder[key[0]] = self.coalesced_by_builder.get(key[0], 0) + 1
+
+    # Run build() for a cache key (whose first item names the builder), or wait
+    # for the identical build already in flight: in the calling thread with
+    # background builds off, otherwise in the pool
+    def run(self, key, build):
+        if not self.enabled:
+            return self._run_inline(key, build)
+
+        request = _current.get()
+        event = threading.Event()
+        with self._lock:
+            if request is not None and request.superseded:
+                raise Superseded
+            job = self._jobs.get(key)
+            if job is None:
+                job = self._jobs[key] = _Job(key)
+                # The build sees the caller's context variables
+                job.future = self._get_executor().submit(contextvars.copy_context().run, build)
+                job.future.add_done_callback(lambda future, job=job: self._finished(job))
+                self.stats['computed'] += 1
+            else:
+                self._coalesce(key)
+            job.waiters += 1
+            if request is not None:
+                request.job, request.event = job, event
+
+        job.future.add_done_callback(lambda future: event.set())
+        event.wait()
+        with self._lock:
+            if request is not None:
+                if request.superseded:
+                    raise Superseded
+                request.job = None
+            job.waiters -= 1
+        return job.future.result()
+
+    # The first caller builds in its own thread; concurrent callers wait for its result
+    def _run_inline(self, key, build):
+        leader = None
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            job = self._jobs.get(key)
+            if job is not None:
+                self._coalesce(key)
+            else:
+                job = self._jobs[key] = _Job(key)
+                job.future = Future()
+                self.stats['computed'] += 1
+                leader = job
+        if job is not leader:
+            return job.future.result()
+
+        try:
+            fig = build()
+        except BaseException as e:
+            job.future.set_exception(e)
+            raise
+        else:
+            job.future.set_result(fig)
+            return fig
+        finally:
+            self._finished(job)
+
+    def info(self):
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._jobs), workers=self.workers, enabled=self.enabled,
+                        coalesced_by_builder=dict(self.coalesced_by_builder))
+
+
+build_pool = BuildPool()
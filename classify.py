@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+
+# --- PERFORMANCE CLASSIFICATION ---
+# Vectorized flags for the product performance chart. A row needs action when
+# both its sales volume and its rating fall below the threshold of their column.
+# Threshold methods: "mean", "median", or a percentile such as "p25".
+THRESHOLD_METHOD = os.environ.get("PRODUCT_THRESHOLD", "mean")
+
+ACTION_COLOR = '#FF8C00'
+NORMAL_COLOR = '#1976D2'
+ACTION_LABEL = 'Action Needed'
+
+
+def _percentile(method):
+    if method.startswith('p'):
+        try:
+            q = float(method[1:])
+        except ValueError:
+            q = None
+        if q is not None and 0 <= q <= 100:
+            return q
+    raise ValueError(f"Unknown threshold method: {method!r} (use mean, median or p0-p100)")
+
+
+# Threshold of one column under the given method
+def threshold(values, method=THRESHOLD_METHOD):
+    values = np.asarray(values, dtype=np.float64)
+    if method == 'mean':
+        return float(values.mean())
+    if method == 'median':
+        return float(np.median(values))
+    return float(np.percentile(values, _percentile(method)))
+
+
+# Legend text for the threshold line, e.g. "Avg Sales Volume" or "P25 Sales Volume"
+def threshold_label(method=THRESHOLD_METHOD):
+    if method == 'mean':
+        return "Avg"
+    if method == 'median':
+        return "Median"
+    return f"P{_percentile(method):g}"
+
+
+# Bar colors and annotations for every row at once, plus the sales volume threshold
+def classify_performance(volume, rating, method=THRESHOLD_METHOD):
+    volume_cut = threshold(volume, method)
+    rating_cut = threshold(rating, method)
+
+    action = (np.asarray(volume) < volume_cut) & (np.asarray(rating) < rating_cut)
+    colors = np.where(action, ACTION_COLOR, NORMAL_COLOR)
+    annotations = np.where(action, ACTION_LABEL, '')
+    return colors, annotations, volume_cut
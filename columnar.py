@@ -0,0 +1,282 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from db_service import (borrow_connection, extract_query_from_file, db_fingerprint, data_version,
+                        snapshot_path, DATA_BACKEND)
+
+# --- IN-MEMORY COLUMNAR ENGINE ---
+# Holds the joined order-item fact table as NumPy arrays, once per worker, and
+# answers the four dashboard aggregations with np.bincount group-bys.
+# Results match the SQL queries in sql/ column for column.
+# Enabled with DASHBOARD_BACKEND=memory (loaded from SQLite) or =arrow
+# (memory-mapped from the snapshot data/db_snapshot.py writes next to the
+# database); see db_service.DATA_BACKEND.
+
+# SQLite ROUND(): half away from zero (np.round rounds half to even)
+def _sql_round(values, digits):
+    scale = 10.0 ** digits
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5) / scale
+
+
+# 'YYYY-MM-01' labels for month ordinals (year * 12 + month - 1)
+def _month_labels(ordinals):
+    return [f"{m // 12:04d}-{m % 12 + 1:02d}-01" for m in ordinals.tolist()]
+
+
+# Fact table columns as the store holds them. data/db_snapshot.py writes the
+# same layout (SNAPSHOT_LAYOUT) to the Arrow snapshot, booleans as uint8.
+FACT_COLUMNS = {
+    'country': np.int16, 'category': np.int16, 'product': np.int32, 'month': np.int32,
+    'active': np.bool_, 'quantity': np.float64, 'revenue': np.float64,
+    'shipping_days': np.float64, 'rating_sum': np.float64, 'rating_count': np.float64,
+    'order_first': np.bool_, 'shipped': np.bool_,
+}
+SNAPSHOT_LAYOUT = 1
+
+
+# The fact table as sql/load_fact_table.sql returns it, in the store's layout:
+# ({name: array} for FACT_COLUMNS with rows sorted by (country, month), and the
+# dimensions the integer codes index). Both ColumnarStore.from_frame and the
+# snapshot writer (data/db_snapshot.py) build their columns here.
+def fact_columns(df):
+    country, countries = pd.factorize(df['country'], sort=True)
+    category, categories = pd.factorize(df['category'], sort=True)
+    product, products = pd.factorize(df['product_id'], sort=True)
+    month = df['order_year'].to_numpy() * 12 + df['order_month'].to_numpy() - 1
+    order = np.lexsort((month, country))
+
+    columns = {
+        'country': country, 'category': category, 'product': product, 'month': month,
+        'active': df['active'].to_numpy(), 'quantity': df['quantity'].to_numpy(),
+        'revenue': df['revenue'].to_numpy(),
+        'shipping_days': df['shipping_days'].to_numpy(dtype=np.float64, na_value=np.nan),
+        'rating_sum': df['rating_sum'].to_numpy(), 'rating_count': df['rating_count'].to_numpy(),
+    }
+    columns = {name: np.asarray(values, dtype=FACT_COLUMNS[name])[order] for name, values in columns.items()}
+
+    # Order-grain measures count each order once: flag its first item
+    order_code = pd.factorize(df['order_id'])[0][order]
+    columns['order_first'] = np.zeros(len(order_code), dtype=bool)
+    columns['order_first'][np.unique(order_code, return_index=True)[1]] = True
+    columns['shipped'] = columns['order_first'] & ~np.isnan(columns['shipping_days'])
+
+    # Category of each product, for the product drill-down
+    product_category = np.zeros(len(products), dtype=np.int16)
+    product_category[columns['product']] = columns['category']
+    dimensions = {'countries': countries.tolist(), 'categories': categories.tolist(),
+                  'products': products.tolist(), 'product_category': product_category.tolist()}
+    return columns, dimensions
+
+
+class ColumnarStore:
+    # columns: {name: array} for FACT_COLUMNS, rows sorted by (country, month) so
+    # a country filter is a slice. The arrays are used as given (no copy), so
+    # they can be views of a memory-mapped snapshot.
+    def __init__(self, countries, categories, products, product_category, columns, data_version=None):
+        self.countries = np.asarray(countries, dtype=object)
+        self.categories = np.asarray(categories, dtype=object)
+        self.products = np.asarray(products, dtype=object)
+        # Category of each product, for the product drill-down
+        self.product_category = np.asarray(product_category, dtype=np.int16)
+        for name in FACT_COLUMNS:
+            setattr(self, name, columns[name])
+        self.data_version = data_version
+
+        self.country_offsets = np.searchsorted(self.country, np.arange(len(self.countries) + 1))
+        self.country_index = {name: i for i, name in enumerate(self.countries.tolist())}
+        self.min_month = int(self.month.min()) if len(self.month) else 0
+        self.n_months = int(self.month.max()) - self.min_month + 1 if len(self.month) else 0
+        self._global_revenue = None
+
+    # From the fact table as sql/load_fact_table.sql returns it
+    @classmethod
+    def from_frame(cls, df, data_version=None):
+        columns, dimensions = fact_columns(df)
+        return cls(columns=columns, data_version=data_version, **dimensions)
+
+    @classmethod
+    def from_sqlite(cls):
+        query = extract_query_from_file("load_fact_table.sql")
+        with borrow_connection() as conn:
+            df = pd.read_sql_query(query, conn)
+        return cls.from_frame(df, data_version())
+
+    # Memory-map the Arrow snapshot written by data/db_snapshot.py (needs pyarrow).
+    # Every column is a read-only view of the mapped file: workers share the
+    # page cache and a chart only reads the pages of the columns it uses.
+    @classmethod
+    def from_snapshot(cls, path):
+        import pyarrow as pa
+
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        meta = json.loads(table.schema.metadata[b'dashboard'])
+        if meta['layout'] != SNAPSHOT_LAYOUT:
+            raise ValueError(f"snapshot layout {meta['layout']}, expected {SNAPSHOT_LAYOUT}")
+
+        columns = {}
+        for name, dtype in FACT_COLUMNS.items():
+            column = table.column(name)
+            values = (column.chunk(0).to_numpy(zero_copy_only=True) if column.num_chunks == 1
+                      else column.to_numpy())
+            columns[name] = values.view(dtype)
+        return cls(meta['countries'], meta['categories'], meta['products'], meta['product_category'],
+                   columns, tuple(meta['data_version']) if meta['data_version'] else None)
+
+    # Row range for one country, or every row for None / "All Countries"
+    def _rows(self, country):
+        if country is None or country == "All Countries":
+            return slice(0, len(self.country))
+        i = self.country_index.get(country)
+        if i is None:
+            return slice(0, 0)
+        return slice(self.country_offsets[i], self.country_offsets[i + 1])
+
+    # --- AGGREGATIONS (mirroring sql/*.sql) ---
+
+    # Yearly totals are computed once per store; a call picks out one year
+    # (the latest if None) and joins the previous year's revenue
+    def global_revenue(self, year=None):
+        if self._global_revenue is None:
+            self._global_revenue = self._compute_global_revenue()
+        yearly = self._global_revenue
+        if yearly.empty:
+            return yearly.assign(prev_revenue=pd.Series(dtype=np.float64))
+
+        year = int(year) if year else int(yearly['year'].max())
+        df = yearly[yearly['year'] == str(year)].reset_index(drop=True)
+        previous = yearly[yearly['year'] == str(year - 1)].set_index('country')['total_revenue']
+        df['prev_revenue'] = df['country'].map(previous)
+        return df
+
+    def _compute_global_revenue(self):
+        n_countries = len(self.countries)
+        years = self.month // 12
+        min_year = int(years.min()) if len(years) else 0
+        key = (years - min_year) * n_countries + self.country
+        size = (int(years.max()) - min_year + 1) * n_countries if len(years) else 0
+
+        items = np.bincount(key, minlength=size)
+        revenue = np.bincount(key, weights=self.revenue, minlength=size)
+        orders = np.bincount(key, weights=self.order_first, minlength=size)
+        shipped = np.bincount(key, weights=self.shipped, minlength=size)
+        shipping_days = np.bincount(key, weights=np.where(self.shipped, self.shipping_days, 0.0), minlength=size)
+
+        groups = np.flatnonzero(items)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                'year': (groups // n_countries + min_year).astype(str),
+                'country': self.countries[groups % n_countries],
+                'total_revenue': revenue[groups],
+                'avg_delivery_time': _sql_round(shipping_days[groups] / shipped[groups], 1),
+                'avg_basket_size': _sql_round(revenue[groups] / orders[groups], 0),
+            })
+
+    # Bucket numbers of `months`-month buckets (1 = month, 3 = calendar quarter):
+    # (bucket of every month ordinal given, first bucket, number of buckets)
+    def _buckets(self, month, months):
+        first = self.min_month // months
+        last = (self.min_month + self.n_months - 1) // months if self.n_months else first - 1
+        return month // months - first, first, last - first + 1
+
+    # months=3 mirrors get_customer_matrix_quarterly.sql
+    def customer_matrix(self, year=None, country=None, months=1):
+        rows = self._rows(country)
+        mask = self.active[rows]
+        if year:
+            mask = mask & (self.month[rows] // 12 == int(year))
+
+        n_countries = len(self.countries)
+        bucket, first, n_buckets = self._buckets(self.month[rows][mask], months)
+        key = bucket * n_countries + self.country[rows][mask]
+        spent = np.bincount(key, weights=self.revenue[rows][mask], minlength=n_buckets * n_countries)
+
+        groups = np.flatnonzero(spent > 0)
+        return pd.DataFrame({
+            'country': self.countries[groups % n_countries],
+            'full_date': _month_labels((groups // n_countries + first) * months),
+            'total_spent': spent[groups],
+        })
+
+    # level="category" mirrors get_product_performance.sql, level="product" get_product_drilldown.sql
+    def product_performance(self, country=None, level='category'):
+        rows = self._rows(country)
+        if level == 'product':
+            key, size = self.product[rows], len(self.products)
+        else:
+            key, size = self.category[rows], len(self.categories)
+
+        volume = np.bincount(key, weights=self.quantity[rows], minlength=size)
+        rating_sum = np.bincount(key, weights=self.rating_sum[rows], minlength=size)
+        rating_count = np.bincount(key, weights=self.rating_count[rows], minlength=size)
+
+        groups = np.flatnonzero(rating_count > 0)
+        groups = groups[np.argsort(-volume[groups], kind='stable')]
+        if level == 'product':
+            labels = {'product_id': self.products[groups],
+                      'category': self.categories[self.product_category[groups]]}
+        else:
+            labels = {'category': self.categories[groups]}
+        return pd.DataFrame(dict(
+            labels,
+            total_sales_volume=volume[groups].astype(np.int64),
+            average_customer_rating=rating_sum[groups] / rating_count[groups],
+        ))
+
+    # months=3 mirrors get_service_quality_quarterly.sql
+    def service_quality(self, country=None, months=1):
+        rows = self._rows(country)
+        shipped = self.shipped[rows]
+        key, first, size = self._buckets(self.month[rows][shipped], months)
+
+        count = np.bincount(key, minlength=size)
+        shipping_days = np.bincount(key, weights=self.shipping_days[rows][shipped], minlength=size)
+        rating_sum = np.bincount(key, weights=self.rating_sum[rows][shipped], minlength=size)
+        rating_count = np.bincount(key, weights=self.rating_count[rows][shipped], minlength=size)
+
+        groups = np.flatnonzero(count)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                'month': _month_labels((groups + first) * months),
+                'avg_shipping_days': shipping_days[groups] / count[groups],
+                'avg_review_score': rating_sum[groups] / rating_count[groups],
+            })
+
+
+# --- PER-WORKER STORE ---
+_store = None
+_store_key = None
+_store_lock = threading.Lock()
+
+
+# The snapshot, if it is there and matches the database; the database otherwise
+def _load_store():
+    if DATA_BACKEND == 'arrow':
+        path = snapshot_path()
+        try:
+            store = ColumnarStore.from_snapshot(path)
+        except (OSError, ImportError, KeyError, ValueError) as e:
+            print(f"Error: Could not read the snapshot {path}: {e}. Loading from the database instead.")
+        else:
+            if store.data_version == data_version():
+                return store
+            print(f"Warning: The snapshot {path} is out of date. Loading from the database instead.")
+    return ColumnarStore.from_sqlite()
+
+
+# Load the fact table on first use in each worker, and again after the database
+# (or, with DASHBOARD_BACKEND=arrow, the snapshot) changes
+def get_store():
+    global _store, _store_key
+    key = (os.getpid(), db_fingerprint())
+    if DATA_BACKEND == 'arrow':
+        key += (db_fingerprint(snapshot_path()),)
+    if _store_key != key:
+        with _store_lock:
+            if _store_key != key:
+                _store = _load_store()
+                _store_key = key
+    return _store
@@ -1,62 +1,510 @@
-import pandas as pd
+import argparse
+import os
 import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
 import numpy as np
-from datetime import timedelta
+import pandas as pd
+
+from db_rollup import build_rollups, refresh_rollups, apply_product_delta, ROLLUP_TABLES
+from db_snapshot import snapshot_path, write_snapshot
+
+# --- ETL SETTINGS ---
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(DATA_DIR, 'ecommerce_dataset_10000.csv')
+# The database the dashboard reads (db_service.db_name)
+DEFAULT_DB = os.path.join(os.path.dirname(DATA_DIR), 'ecommerce_project.db')
+DEFAULT_CHUNKSIZE = 100_000
+# Normalized export (Customer / Orders / Product / Review.csv), see load_normalized
+DEFAULT_NORMALIZED_DIR = os.path.join(os.path.dirname(DATA_DIR), 'CSV_data')
+
+# Compact dtypes for the streaming reader; only the columns the tables use are read
+CSV_DTYPES = {
+    'customer_id': 'object',
+    'first_name': 'object',
+    'age_group': 'category',
+    'country': 'category',
+    'product_id': 'object',
+    'product_name': 'category',
+    'category': 'category',
+    'quantity': 'int32',
+    'unit_price': 'float64',
+    'order_id': 'object',
+    'order_status': 'category',
+    'rating': 'int8',
+    'review_id': 'object',
+}
+DATE_COLUMNS = ['order_date', 'signup_date', 'review_date']
+
+# --- 3NF NORMALIZATION (Splitting into 5 Tables) ---
+# table -> (key column deduplicated on, columns written); in this dataset
+# 1 row = 1 item, so Order_Items is not deduplicated
+TABLES = {
+    'Customers': ('customer_id', ['customer_id', 'first_name', 'country', 'age_group', 'signup_date']),
+    'Orders': ('order_id', ['order_id', 'customer_id', 'order_date', 'delivery_date', 'order_status', 'order_year', 'order_month']),
+    'Products': ('product_id', ['product_id', 'product_name', 'category']),
+    'Order_Items': (None, ['order_item_id', 'order_id', 'product_id', 'quantity', 'unit_price']),
+    'Reviews': ('review_id', ['review_id', 'order_id', 'rating', 'review_date']),
+}
 
-# 1. Load the Raw Data
-df = pd.read_csv('ecommerce_dataset_10000.csv')
 
 # --- DATA PREPARATION & CLEANING ---
+# rng draws the synthetic delivery delays; one RandomState(42) shared by all chunks
+# produces the same dates as a single full-file pass
+def prepare(df, rng, first_item_id=1):
+    # Convert dates to datetime objects
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col])
 
-# Convert dates to datetime objects
-df['order_date'] = pd.to_datetime(df['order_date'])
-df['signup_date'] = pd.to_datetime(df['signup_date'])
-df['review_date'] = pd.to_datetime(df['review_date'])
+    # FIX: Synthesize 'delivery_date' since it's missing (Required for Vis 1 & 4)
+    # Logic: Delivery takes between 2 to 7 days after order
+    random_days = rng.randint(2, 8, size=len(df))
+    df['delivery_date'] = df['order_date'] + pd.to_timedelta(random_days, unit='D')
 
-# FIX: Synthesize 'delivery_date' since it's missing (Required for Vis 1 & 4)
-# Logic: Delivery takes between 2 to 7 days after order
-np.random.seed(42) # For reproducibility
-random_days = np.random.randint(2, 8, size=len(df))
-df['delivery_date'] = df['order_date'] + pd.to_timedelta(random_days, unit='D')
+    # Ensure unit_price is a float for math
+    df['unit_price'] = df['unit_price'].astype(float)
 
-# Ensure unit_price is a float for math
-df['unit_price'] = df['unit_price'].astype(float)
+    # Precompute integer year/month so year filters do not need STRFTIME
+    df['order_year'] = df['order_date'].dt.year
+    df['order_month'] = df['order_date'].dt.month
 
+    # Store dates as ISO 'YYYY-MM-DD' text (matches the DATE columns in schema.sql)
+    for col in DATE_COLUMNS + ['delivery_date']:
+        df[col] = df[col].dt.strftime('%Y-%m-%d')
 
-# --- 3NF NORMALIZATION (Splitting into 5 Tables) ---
+    # Create a unique ID for each item row, continuing across chunks
+    df['order_item_id'] = np.arange(first_item_id, first_item_id + len(df))
+    return df
+
+
+# schema.sql split into table statements and CREATE INDEX statements, so a
+# bulk load can build the secondary indexes once at the end
+def schema_statements():
+    tables, indexes = [], []
+    statement = ''
+    with open(os.path.join(DATA_DIR, 'schema.sql'), 'r') as file:
+        for line in file:
+            if not statement and (not line.strip() or line.lstrip().startswith('--')):
+                continue
+            statement += line
+            if sqlite3.complete_statement(statement):
+                (indexes if statement.upper().startswith('CREATE INDEX') else tables).append(statement)
+                statement = ''
+    return tables, indexes
+
+
+# Create tables with primary keys and, unless deferred, their indexes (see schema.sql)
+def create_schema(conn, indexes=True):
+    tables, index_statements = schema_statements()
+    conn.executescript(''.join(tables + (index_statements if indexes else [])))
+
+
+def create_indexes(conn):
+    conn.executescript(''.join(schema_statements()[1]))
+
+
+# Whole-file load: read the CSV at once and write each table with to_sql
+def load_frame(conn, csv_path):
+    df = prepare(pd.read_csv(csv_path), np.random.RandomState(42))
+
+    for table, (key, columns) in TABLES.items():
+        rows = df[columns]
+        if key is not None:
+            rows = rows.drop_duplicates(subset=[key])
+        rows.to_sql(table, conn, if_exists='append', index=False)
+    return len(df)
+
+
+# Deduplicated rows per table, one CSV chunk at a time: yields (table, frame).
+# Memory is bounded by the chunk size plus the sets of keys seen so far; every
+# chunk is deduplicated against those sets (first occurrence wins).
+def stream_rows(csv_path, chunksize=DEFAULT_CHUNKSIZE):
+    rng = np.random.RandomState(42)
+    seen = {table: set() for table, (key, _) in TABLES.items() if key is not None}
+
+    total = 0
+    with pd.read_csv(csv_path, usecols=list(CSV_DTYPES) + DATE_COLUMNS,
+                     dtype=CSV_DTYPES, chunksize=chunksize) as reader:
+        for chunk in reader:
+            chunk = prepare(chunk, rng, first_item_id=total + 1)
+            for table, (key, columns) in TABLES.items():
+                rows = chunk[columns]
+                if key is not None:
+                    rows = rows.drop_duplicates(subset=[key])
+                    keys = seen[table]
+                    rows = rows[[k not in keys for k in rows[key].tolist()]]
+                    keys.update(rows[key].tolist())
+                yield table, rows
+            total += len(chunk)
+
+
+# Row tuples for executemany
+def records(rows):
+    return zip(*(rows[col].tolist() for col in rows.columns))
+
+
+def insert_sql(table, columns):
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+# Bulk-load settings: no rollback journal, no fsync (rebuild on failure),
+# and a 64MB page cache for the primary-key B-trees. Expects the tables to
+# exist without their secondary indexes (create_schema(conn, indexes=False));
+# builds them at the end.
+@contextmanager
+def bulk_load(conn):
+    conn.execute("PRAGMA journal_mode = OFF;")
+    conn.execute("PRAGMA synchronous = OFF;")
+    conn.execute("PRAGMA cache_size = -65536;")
+    try:
+        with conn:
+            yield
+        create_indexes(conn)
+    finally:
+        conn.execute("PRAGMA journal_mode = DELETE;")
+        conn.execute("PRAGMA synchronous = FULL;")
+        conn.execute("PRAGMA cache_size = -2000;")
+
+
+# Streaming load: bulk-inserts every chunk with executemany, all inside one transaction
+def load_streaming(conn, csv_path, chunksize=DEFAULT_CHUNKSIZE):
+    inserts = {table: insert_sql(table, columns) for table, (_, columns) in TABLES.items()}
+
+    total = 0
+    with bulk_load(conn):
+        for table, rows in stream_rows(csv_path, chunksize):
+            conn.executemany(inserts[table], records(rows))
+            if table == 'Order_Items':
+                total += len(rows)
+    return total
+
+
+# --- NORMALIZED LOAD (CSV_data/) ---
+# The normalized export stores each entity once, so no redundant customer /
+# product columns are parsed. The four files are parsed concurrently in a
+# process pool, checked for referential integrity with hash joins, and
+# written into the same schema with the bulk-load settings above.
+# Orders.csv has one row per order item; Review.csv identifies the order by
+# (reviewer_id, product_id), and the n-th review of a pair belongs to the
+# n-th order row of that pair.
+# Low-cardinality columns (dates, product ids) are read as categoricals: dates
+# are parsed once per distinct value, and the frames pickle back to the parent
+# as small integer codes.
+
+# Categorical date column -> (datetime64[D] per row, ISO 'YYYY-MM-DD' categorical)
+def _parse_dates(column):
+    days = pd.to_datetime(column.cat.categories).values.astype('datetime64[D]')
+    codes = column.cat.codes.to_numpy()
+    return days[codes], pd.Categorical.from_codes(codes, np.datetime_as_string(days))
+
+
+def _read_customers(path):
+    df = pd.read_csv(path, usecols=TABLES['Customers'][1],
+                     dtype={'age_group': 'category', 'country': 'category', 'signup_date': 'category'})
+    df['signup_date'] = _parse_dates(df['signup_date'])[1]
+    return df
+
+
+def _read_products(path):
+    df = pd.read_csv(path, usecols=['product_id', 'product_name', 'product_category', 'unit_price'],
+                     dtype={'unit_price': 'float64'})
+    return df.rename(columns={'product_category': 'category'})
+
+
+# Delivery dates are drawn per order row with RandomState(42), like prepare()
+def _read_orders(path):
+    df = pd.read_csv(path, usecols=['order_id', 'order_date', 'order_status', 'order_quantity',
+                                    'customer_id', 'product_id'],
+                     dtype={'order_status': 'category', 'order_quantity': 'int32',
+                            'order_date': 'category', 'product_id': 'category'})
+    order_day, df['order_date'] = _parse_dates(df['order_date'])
+    delivery_day = order_day + np.random.RandomState(42).randint(2, 8, size=len(df))
+    df['delivery_date'] = pd.Categorical(np.datetime_as_string(delivery_day))
+    months = order_day.astype('datetime64[M]').astype(np.int64)
+    df['order_year'] = (months // 12 + 1970).astype(np.int32)
+    df['order_month'] = (months % 12 + 1).astype(np.int32)
+    return df.rename(columns={'order_quantity': 'quantity'})
+
+
+def _read_reviews(path):
+    df = pd.read_csv(path, usecols=['review_id', 'review_rating', 'review_date', 'reviewer_id', 'product_id'],
+                     dtype={'review_rating': 'int8', 'review_date': 'category', 'product_id': 'category'})
+    df['review_date'] = _parse_dates(df['review_date'])[1]
+    return df.rename(columns={'review_rating': 'rating', 'reviewer_id': 'customer_id'})
+
+
+NORMALIZED_FILES = {
+    'customers': ('Customer.csv', _read_customers),
+    'products': ('Product.csv', _read_products),
+    'orders': ('Orders.csv', _read_orders),
+    'reviews': ('Review.csv', _read_reviews),
+}
+
+
+# One parsing process per file, up to the number of CPUs
+DEFAULT_WORKERS = min(len(NORMALIZED_FILES), os.cpu_count() or 1)
+
+
+# Parse the four files, one process each (workers=1 parses them in turn)
+def read_normalized(csv_dir, workers=DEFAULT_WORKERS):
+    paths = {name: os.path.join(csv_dir, filename) for name, (filename, _) in NORMALIZED_FILES.items()}
+    if workers <= 1:
+        return {name: NORMALIZED_FILES[name][1](path) for name, path in paths.items()}
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        futures = {name: pool.submit(NORMALIZED_FILES[name][1], path) for name, path in paths.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+# Raise SystemExit naming the first few keys with nothing to refer to
+def _check_references(label, orphans):
+    if len(orphans):
+        sample = ', '.join(map(str, orphans.unique()[:5]))
+        raise SystemExit(f"Referential integrity: {len(orphans):,} {label} ({sample})")
+
+
+# The five tables from the parsed files, after the integrity checks
+def normalize(frames):
+    customers = frames['customers'].drop_duplicates(subset=['customer_id'])
+    products = frames['products'].drop_duplicates(subset=['product_id'])
+    orders, reviews = frames['orders'], frames['reviews']
+
+    _check_references("orders with an unknown customer_id",
+                      orders.loc[~orders['customer_id'].isin(customers['customer_id']), 'customer_id'])
+    _check_references("orders with an unknown product_id",
+                      orders.loc[~orders['product_id'].isin(products['product_id']), 'product_id'])
+
+    # Items take the product's unit price; one item per order row
+    items = orders[['order_id', 'product_id', 'quantity']].copy()
+    items['unit_price'] = items['product_id'].map(products.set_index('product_id')['unit_price'])
+    items.insert(0, 'order_item_id', np.arange(1, len(items) + 1))
+
+    # Reviews -> order_id: hash join on (customer_id, product_id, occurrence)
+    pair = ['customer_id', 'product_id']
+    order_keys = orders[pair + ['order_id']].assign(n=orders.groupby(pair, sort=False).cumcount())
+    reviews = reviews.assign(n=reviews.groupby(pair, sort=False).cumcount())
+    reviews = reviews.merge(order_keys, on=pair + ['n'], how='left', sort=False)
+    _check_references("reviews without a matching order", reviews.loc[reviews['order_id'].isna(), 'review_id'])
+
+    return {
+        'Customers': customers,
+        'Orders': orders.drop_duplicates(subset=['order_id']),
+        'Products': products,
+        'Order_Items': items,
+        'Reviews': reviews.drop_duplicates(subset=['review_id']),
+    }
+
+
+# Write the output of normalize(); validation runs before any table is replaced
+def load_normalized(conn, tables):
+    with bulk_load(conn):
+        for table, (_, columns) in TABLES.items():
+            conn.executemany(insert_sql(table, columns), records(tables[table][columns]))
+    return len(tables['Order_Items'])
+
+
+# --- INCREMENTAL LOAD ---
+# Upserts a CSV of new or changed orders into an existing database and refreshes
+# only the rollup groups they touch. An order in the file carries its complete
+# item list; orders whose rows match the database are left alone.
+
+# Columns not compared when detecting changes, with how an update sets them.
+# delivery_date is synthetic, so an order keeps it unless its order_date changed.
+UPSERT_OVERRIDES = {
+    'Orders': {
+        'delivery_date': "CASE WHEN Orders.order_date = excluded.order_date "
+                         "THEN Orders.delivery_date ELSE excluded.delivery_date END",
+    },
+}
+
+# Orders whose rollup groups can change. touched_items holds orders whose item list
+# differs from the database (including new orders); touched_orders adds new or
+# edited orders and reviews, and orders of customers / products that moved
+# country / category.
+TOUCHED_ORDERS_SQL = [
+    """INSERT OR IGNORE INTO temp.touched_items
+       SELECT order_id FROM (
+           SELECT order_id, product_id, quantity, unit_price FROM temp.stage_Order_Items
+           EXCEPT
+           SELECT order_id, product_id, quantity, unit_price FROM Order_Items
+           WHERE order_id IN (SELECT order_id FROM temp.stage_Order_Items)
+       )
+       UNION
+       SELECT order_id FROM (
+           SELECT order_id, product_id, quantity, unit_price FROM Order_Items
+           WHERE order_id IN (SELECT order_id FROM temp.stage_Order_Items)
+           EXCEPT
+           SELECT order_id, product_id, quantity, unit_price FROM temp.stage_Order_Items
+       )""",
+    """INSERT OR IGNORE INTO temp.touched_orders SELECT order_id FROM temp.touched_items""",
+    """INSERT OR IGNORE INTO temp.touched_orders
+       SELECT s.order_id FROM temp.stage_Orders s
+       LEFT JOIN Orders o ON o.order_id = s.order_id
+       WHERE o.order_id IS NULL
+          OR (o.customer_id, o.order_date, o.order_status) IS NOT (s.customer_id, s.order_date, s.order_status)""",
+    """INSERT OR IGNORE INTO temp.touched_orders
+       SELECT s.order_id FROM temp.stage_Reviews s
+       LEFT JOIN Reviews r ON r.review_id = s.review_id
+       WHERE r.review_id IS NULL
+          OR (r.order_id, r.rating, r.review_date) IS NOT (s.order_id, s.rating, s.review_date)
+       UNION
+       SELECT r.order_id FROM temp.stage_Reviews s
+       JOIN Reviews r ON r.review_id = s.review_id
+       WHERE r.order_id <> s.order_id""",
+    """INSERT OR IGNORE INTO temp.touched_orders
+       SELECT o.order_id FROM temp.stage_Customers s
+       JOIN Customers c ON c.customer_id = s.customer_id
+       JOIN Orders o ON o.customer_id = c.customer_id
+       WHERE c.country <> s.country""",
+    """INSERT OR IGNORE INTO temp.touched_orders
+       SELECT oi.order_id FROM temp.stage_Products s
+       JOIN Products p ON p.product_id = s.product_id
+       JOIN Order_Items oi ON oi.product_id = p.product_id
+       WHERE p.category <> s.category""",
+]
+
+# Monthly rollup groups the touched orders fall in; run before and after the
+# upsert so groups an order moves out of are refreshed too
+STALE_MONTHS_SQL = """
+SELECT DISTINCT c.country, o.order_year, o.order_month
+FROM temp.touched_orders t
+CROSS JOIN Orders o ON o.order_id = t.order_id
+CROSS JOIN Customers c ON c.customer_id = o.customer_id
+"""
+
+
+# INSERT ... ON CONFLICT DO UPDATE that only rewrites rows whose values differ
+def upsert_sql(table, key, columns):
+    overrides = UPSERT_OVERRIDES.get(table, {})
+    values = [col for col in columns if col != key]
+    compared = [col for col in values if col not in overrides]
+    assignments = ', '.join(f"{col} = {overrides.get(col, f'excluded.{col}')}" for col in values)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"SELECT {', '.join(columns)} FROM temp.stage_{table} WHERE true "
+        f"ON CONFLICT ({key}) DO UPDATE SET {assignments} "
+        f"WHERE ({', '.join(f'{table}.{col}' for col in compared)}) "
+        f"IS NOT ({', '.join(f'excluded.{col}' for col in compared)})"
+    )
+
+
+def load_incremental(conn, csv_path, chunksize=DEFAULT_CHUNKSIZE):
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'Data_Version'").fetchone() is None:
+        raise SystemExit("No Data_Version table: rebuild the database without --incremental first.")
+
+    # 1. Stage the file in temp tables shaped like the real ones
+    for table, (key, columns) in TABLES.items():
+        conn.execute(f"DROP TABLE IF EXISTS temp.stage_{table}")
+        conn.execute(f"CREATE TEMP TABLE stage_{table} AS SELECT {', '.join(columns)} FROM {table} WHERE 0")
+        conn.execute(f"CREATE INDEX temp.idx_stage_{table} ON stage_{table} ({key or 'order_id'})")
+    for name in ['touched_items', 'touched_orders']:
+        conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+        conn.execute(f"CREATE TEMP TABLE {name} (order_id TEXT PRIMARY KEY)")
+
+    total = 0
+    with conn:
+        for table, rows in stream_rows(csv_path, chunksize):
+            conn.executemany(insert_sql(f"temp.stage_{table}", list(rows.columns)), records(rows))
+            if table == 'Order_Items':
+                total += len(rows)
+
+    # 2. Upsert and refresh the rollups in one transaction. The database may be
+    # live, so the journal stays on; only the page cache is enlarged.
+    conn.execute("PRAGMA cache_size = -65536;")
+    with conn:
+        for statement in TOUCHED_ORDERS_SQL:
+            conn.execute(statement)
+        months = set(conn.execute(STALE_MONTHS_SQL).fetchall())
+        apply_product_delta(conn, -1)
+
+        for table, (key, columns) in TABLES.items():
+            if key is not None:
+                conn.execute(upsert_sql(table, key, columns))
+
+        # Replace the item lists of orders whose items changed, with fresh item ids
+        conn.execute("DELETE FROM Order_Items WHERE order_id IN (SELECT order_id FROM temp.touched_items)")
+        next_id = conn.execute("SELECT COALESCE(MAX(order_item_id), 0) FROM Order_Items").fetchone()[0]
+        columns = TABLES['Order_Items'][1]
+        conn.execute(
+            f"INSERT INTO Order_Items ({', '.join(columns)}) "
+            f"SELECT order_item_id + ?, {', '.join(columns[1:])} FROM temp.stage_Order_Items "
+            f"WHERE order_id IN (SELECT order_id FROM temp.touched_items) ORDER BY order_item_id",
+            (next_id,))
+
+        months.update(conn.execute(STALE_MONTHS_SQL).fetchall())
+        apply_product_delta(conn, 1)
+        touched = conn.execute("SELECT COUNT(*) FROM temp.touched_orders").fetchone()[0]
+        if not touched:
+            version = conn.execute("SELECT MAX(version) FROM Data_Version").fetchone()[0]
+            return total, 0, 0, version
+        version = refresh_rollups(conn, sorted(months))
+
+    return total, touched, len(months), version
 
-# 1. CUSTOMERS Table
-customers = df[['customer_id', 'first_name', 'country', 'age_group', 'signup_date']].drop_duplicates(subset=['customer_id'])
 
-# 2. ORDERS Table
-orders = df[['order_id', 'customer_id', 'order_date', 'delivery_date', 'order_status']].drop_duplicates(subset=['order_id'])
+def main():
+    parser = argparse.ArgumentParser(description="Build the dashboard database from the raw CSV export.")
+    parser.add_argument('--csv', default=DEFAULT_CSV, help="source CSV (default: data/ecommerce_dataset_10000.csv)")
+    parser.add_argument('--db', default=DEFAULT_DB, help="SQLite database to create (default: ecommerce_project.db)")
+    parser.add_argument('--stream', action='store_true', help="read the CSV in chunks with bounded memory")
+    parser.add_argument('--normalized', nargs='?', const=DEFAULT_NORMALIZED_DIR, metavar='DIR',
+                        help="load the normalized Customer/Orders/Product/Review.csv files "
+                             "(default directory: CSV_data/) instead of --csv")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"processes parsing the --normalized files (default: {DEFAULT_WORKERS}, the CPU count up to 4)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="upsert new or changed rows into an existing database and refresh only the affected rollups")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"rows per chunk with --stream / --incremental (default: {DEFAULT_CHUNKSIZE})")
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help="do not write the columnar snapshot (<db>.arrow) for DASHBOARD_BACKEND=arrow")
+    args = parser.parse_args()
 
-# 3. PRODUCTS Table
-products = df[['product_id', 'product_name', 'category']].drop_duplicates(subset=['product_id'])
+    conn = sqlite3.connect(args.db)
 
-# 4. ORDER_ITEMS Table
-# In this specific dataset, 1 row = 1 item. We map it directly.
-order_items = df[['order_id', 'product_id', 'quantity', 'unit_price']].copy()
-# Create a unique ID for each item row (optional but good practice)
-order_items['order_item_id'] = range(1, len(order_items) + 1)
+    if args.incremental:
+        started = time.perf_counter()
+        rows, touched, groups, version = load_incremental(conn, args.csv, args.chunksize)
+        seconds = time.perf_counter() - started
+        print(f"Read {rows:,} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
+        print(f"{touched:,} orders changed, {groups:,} (country, month) groups refreshed, data version {version}")
+        # The snapshot is rewritten in full: it carries the data version it was built from
+        if touched and not args.no_snapshot and write_snapshot(conn, args.db) is not None:
+            print(f"Snapshot written to {snapshot_path(args.db)}")
+        conn.close()
+        return
 
-# 5. REVIEWS Table
-reviews = df[['review_id', 'order_id', 'rating', 'review_date']].drop_duplicates(subset=['review_id'])
+    # 1. Load the Raw Data
+    started = time.perf_counter()
+    if args.normalized:
+        tables = normalize(read_normalized(args.normalized, args.workers))
+        create_schema(conn, indexes=False)
+        rows = load_normalized(conn, tables)
+    elif args.stream:
+        create_schema(conn, indexes=False)
+        rows = load_streaming(conn, args.csv, args.chunksize)
+    else:
+        create_schema(conn)
+        rows = load_frame(conn, args.csv)
+    seconds = time.perf_counter() - started
+    print(f"Loaded {rows:,} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
 
+    # --- BUILD ROLLUP TABLES ---
+    # Aggregates read by the dashboard queries in sql/
+    build_rollups(conn)
 
-# --- SAVE TO SQLITE ---
+    # --- WRITE COLUMNAR SNAPSHOT ---
+    # Memory-mapped by the dashboard workers with DASHBOARD_BACKEND=arrow
+    if not args.no_snapshot and write_snapshot(conn, args.db) is not None:
+        print(f"Snapshot written to {snapshot_path(args.db)}")
 
-db_name = "ecommerce_project.db"
-conn = sqlite3.connect(db_name)
+    conn.close()
 
-# Write tables to database
-customers.to_sql('Customers', conn, if_exists='replace', index=False)
-orders.to_sql('Orders', conn, if_exists='replace', index=False)
-products.to_sql('Products', conn, if_exists='replace', index=False)
-order_items.to_sql('Order_Items', conn, if_exists='replace', index=False)
-reviews.to_sql('Reviews', conn, if_exists='replace', index=False)
+    print(f"Successfully created {args.db} with 5 tables!")
+    print(f"Tables created: {', '.join(TABLES)}")
+    print(f"Rollup tables created: {', '.join(ROLLUP_TABLES)}")
 
-conn.close()
 
-print(f"Successfully created {db_name} with 5 tables!")
-print("Tables created: Customers, Orders, Products, Order_Items, Reviews")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
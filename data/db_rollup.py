@@ -0,0 +1,401 @@
+import sqlite3
+import sys
+import uuid
+
+# --- ROLLUP STAGE ---
+# Pre-aggregates the normalized tables into small monthly fact tables so the
+# dashboard queries scale with the number of groups instead of order rows.
+
+# 1. Sales per (country, year, month, category)
+# rating_sum / rating_count follow the review join used by the product chart:
+# every item carries all ratings of its order.
+MONTHLY_SALES_DDL = """
+DROP TABLE IF EXISTS Monthly_Sales;
+CREATE TABLE Monthly_Sales (
+    country         TEXT    NOT NULL,
+    year            INTEGER NOT NULL,
+    month           INTEGER NOT NULL,
+    category        TEXT    NOT NULL,
+    revenue         REAL    NOT NULL,
+    active_revenue  REAL    NOT NULL,
+    sales_volume    INTEGER NOT NULL,
+    rating_sum      REAL    NOT NULL,
+    rating_count    INTEGER NOT NULL,
+    PRIMARY KEY (country, year, month, category)
+) WITHOUT ROWID;
+CREATE INDEX idx_monthly_sales_year ON Monthly_Sales (year, month, country);
+"""
+
+MONTHLY_SALES_FILL = """
+INSERT INTO Monthly_Sales
+WITH order_reviews AS (
+    SELECT order_id, TOTAL(rating) AS rating_sum, COUNT(rating) AS rating_count
+    FROM Reviews
+    {review_scope}
+    GROUP BY order_id
+)
+SELECT
+    c.country,
+    o.order_year AS year,
+    o.order_month AS month,
+    p.category,
+    SUM(oi.quantity * oi.unit_price) AS revenue,
+    TOTAL(CASE WHEN o.order_status IN ('Pending', 'Delivered', 'Shipped')
+               THEN oi.quantity * oi.unit_price END) AS active_revenue,
+    SUM(oi.quantity) AS sales_volume,
+    TOTAL(r.rating_sum) AS rating_sum,
+    TOTAL(r.rating_count) AS rating_count
+FROM {items}
+{join} Orders o ON oi.order_id = o.order_id
+{join} Customers c ON o.customer_id = c.customer_id
+{join} Products p ON oi.product_id = p.product_id
+LEFT JOIN order_reviews r ON oi.order_id = r.order_id
+GROUP BY c.country, year, month, p.category;
+"""
+
+# 2. Orders per (country, year, month)
+# Order counts and delivery times are not additive across categories, so they
+# live in their own table at order grain.
+MONTHLY_ORDERS_DDL = """
+DROP TABLE IF EXISTS Monthly_Orders;
+CREATE TABLE Monthly_Orders (
+    country             TEXT    NOT NULL,
+    year                INTEGER NOT NULL,
+    month               INTEGER NOT NULL,
+    order_count         INTEGER NOT NULL,
+    shipped_count       INTEGER NOT NULL,
+    shipping_days_sum   REAL    NOT NULL,
+    rating_sum          REAL    NOT NULL,
+    rating_count        INTEGER NOT NULL,
+    PRIMARY KEY (country, year, month)
+) WITHOUT ROWID;
+CREATE INDEX idx_monthly_orders_year ON Monthly_Orders (year, month, country);
+"""
+
+MONTHLY_ORDERS_FILL = """
+INSERT INTO Monthly_Orders
+WITH order_reviews AS (
+    SELECT order_id, TOTAL(rating) AS rating_sum, COUNT(rating) AS rating_count
+    FROM Reviews
+    {review_scope}
+    GROUP BY order_id
+)
+SELECT
+    c.country,
+    o.order_year AS year,
+    o.order_month AS month,
+    COUNT(*) AS order_count,
+    COUNT(o.delivery_date) AS shipped_count,
+    TOTAL(JULIANDAY(o.delivery_date) - JULIANDAY(o.order_date)) AS shipping_days_sum,
+    TOTAL(CASE WHEN o.delivery_date IS NOT NULL THEN r.rating_sum END) AS rating_sum,
+    TOTAL(CASE WHEN o.delivery_date IS NOT NULL THEN r.rating_count END) AS rating_count
+FROM {orders}
+{join} Customers c ON o.customer_id = c.customer_id
+LEFT JOIN order_reviews r ON o.order_id = r.order_id
+WHERE EXISTS (SELECT 1 FROM Order_Items oi WHERE oi.order_id = o.order_id)
+GROUP BY c.country, year, month;
+"""
+
+# 2b. The same per (country, year, month, day), for a zoomed service quality
+# chart (day or week buckets, see timeseries.py). A few rows per country a day.
+DAILY_ORDERS_DDL = """
+DROP TABLE IF EXISTS Daily_Orders;
+CREATE TABLE Daily_Orders (
+    country             TEXT    NOT NULL,
+    year                INTEGER NOT NULL,
+    month               INTEGER NOT NULL,
+    day                 INTEGER NOT NULL,
+    order_count         INTEGER NOT NULL,
+    shipped_count       INTEGER NOT NULL,
+    shipping_days_sum   REAL    NOT NULL,
+    rating_sum          REAL    NOT NULL,
+    rating_count        INTEGER NOT NULL,
+    PRIMARY KEY (country, year, month, day)
+) WITHOUT ROWID;
+CREATE INDEX idx_daily_orders_date ON Daily_Orders (year, month, day, country);
+"""
+
+DAILY_ORDERS_FILL = """
+INSERT INTO Daily_Orders
+WITH order_reviews AS (
+    SELECT order_id, TOTAL(rating) AS rating_sum, COUNT(rating) AS rating_count
+    FROM Reviews
+    {review_scope}
+    GROUP BY order_id
+)
+SELECT
+    c.country,
+    o.order_year AS year,
+    o.order_month AS month,
+    CAST(STRFTIME('%d', o.order_date) AS INTEGER) AS day,
+    COUNT(*) AS order_count,
+    COUNT(o.delivery_date) AS shipped_count,
+    TOTAL(JULIANDAY(o.delivery_date) - JULIANDAY(o.order_date)) AS shipping_days_sum,
+    TOTAL(CASE WHEN o.delivery_date IS NOT NULL THEN r.rating_sum END) AS rating_sum,
+    TOTAL(CASE WHEN o.delivery_date IS NOT NULL THEN r.rating_count END) AS rating_count
+FROM {orders}
+{join} Customers c ON o.customer_id = c.customer_id
+LEFT JOIN order_reviews r ON o.order_id = r.order_id
+WHERE EXISTS (SELECT 1 FROM Order_Items oi WHERE oi.order_id = o.order_id)
+GROUP BY c.country, year, month, day;
+"""
+
+# 3. Sales per (country, product_id), for the product drill-down
+# Same measures as Monthly_Sales; the product chart is not filtered by date.
+PRODUCT_SALES_DDL = """
+DROP TABLE IF EXISTS Product_Sales;
+CREATE TABLE Product_Sales (
+    country         TEXT    NOT NULL,
+    product_id      TEXT    NOT NULL,
+    category        TEXT    NOT NULL,
+    sales_volume    INTEGER NOT NULL,
+    rating_sum      REAL    NOT NULL,
+    rating_count    INTEGER NOT NULL,
+    PRIMARY KEY (country, product_id)
+) WITHOUT ROWID;
+"""
+
+PRODUCT_SALES_FILL = """
+INSERT INTO Product_Sales
+WITH order_reviews AS (
+    SELECT order_id, TOTAL(rating) AS rating_sum, COUNT(rating) AS rating_count
+    FROM Reviews
+    GROUP BY order_id
+)
+SELECT
+    c.country,
+    p.product_id,
+    p.category,
+    SUM(oi.quantity) AS sales_volume,
+    TOTAL(r.rating_sum) AS rating_sum,
+    TOTAL(r.rating_count) AS rating_count
+FROM Order_Items oi
+JOIN Orders o ON oi.order_id = o.order_id
+JOIN Customers c ON o.customer_id = c.customer_id
+JOIN Products p ON oi.product_id = p.product_id
+LEFT JOIN order_reviews r ON oi.order_id = r.order_id
+GROUP BY c.country, p.product_id;
+"""
+
+# 4. Dropdown options: the distinct years (newest first) and countries
+# The dashboard reads these few rows instead of a DISTINCT over Orders / Customers.
+# Each list is walked through its index one seek per value (a skip scan), so
+# refreshing it after an incremental load costs almost nothing. The table is
+# created on first fill, so incremental loads into older databases add it.
+FILTER_OPTIONS_DDL = """
+CREATE TABLE IF NOT EXISTS Filter_Options (
+    filter      TEXT    NOT NULL,   -- 'year' or 'country'
+    position    INTEGER NOT NULL,   -- order in the dropdown
+    value       TEXT    NOT NULL,
+    PRIMARY KEY (filter, position)
+) WITHOUT ROWID
+"""
+
+FILTER_OPTIONS_FILL = [
+    FILTER_OPTIONS_DDL,
+    "DELETE FROM Filter_Options",
+    """
+    INSERT INTO Filter_Options
+    WITH RECURSIVE years (year) AS (
+        SELECT MAX(order_year) FROM Orders
+        UNION ALL
+        SELECT (SELECT MAX(order_year) FROM Orders WHERE order_year < years.year) FROM years
+        WHERE years.year IS NOT NULL
+    )
+    SELECT 'year', ROW_NUMBER() OVER (ORDER BY year DESC), CAST(year AS TEXT) FROM years
+    WHERE year IS NOT NULL
+    """,
+    """
+    INSERT INTO Filter_Options
+    WITH RECURSIVE countries (country) AS (
+        SELECT MIN(country) FROM Customers
+        UNION ALL
+        SELECT (SELECT MIN(country) FROM Customers WHERE country > countries.country) FROM countries
+        WHERE countries.country IS NOT NULL
+    )
+    SELECT 'country', ROW_NUMBER() OVER (ORDER BY country), country FROM countries
+    WHERE country IS NOT NULL
+    """,
+]
+
+ROLLUP_TABLES = ['Monthly_Sales', 'Monthly_Orders', 'Daily_Orders', 'Product_Sales', 'Filter_Options']
+
+# --- INCREMENTAL REFRESH ---
+# The monthly fills above read {items} / {orders}, join with {join} and take a
+# {review_scope} clause. A full build reads the whole tables and lets the planner
+# order the joins; a refresh starts from the orders of the stale groups, with
+# CROSS JOIN pinning that join order (SQLite never reorders across CROSS JOIN).
+STALE_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS stale_months (
+    country TEXT, year INTEGER, month INTEGER, PRIMARY KEY (country, year, month)
+);
+CREATE TEMP TABLE IF NOT EXISTS refresh_orders (order_id TEXT PRIMARY KEY);
+DELETE FROM temp.stale_months;
+DELETE FROM temp.refresh_orders;
+"""
+
+# Every order in a stale (country, year, month) group
+REFRESH_ORDERS_FILL = """
+INSERT INTO temp.refresh_orders
+SELECT o.order_id
+FROM temp.stale_months s
+CROSS JOIN Orders o ON o.order_year = s.year AND o.order_month = s.month
+CROSS JOIN Customers c ON c.customer_id = o.customer_id
+WHERE c.country = s.country;
+"""
+
+FULL_SCOPE = {'items': 'Order_Items oi', 'orders': 'Orders o', 'join': 'JOIN', 'review_scope': ''}
+
+MONTH_SCOPE = {
+    'items': "temp.refresh_orders s CROSS JOIN Order_Items oi ON oi.order_id = s.order_id",
+    'orders': "temp.refresh_orders s CROSS JOIN Orders o ON o.order_id = s.order_id",
+    'join': 'CROSS JOIN',
+    'review_scope': "WHERE order_id IN (SELECT order_id FROM temp.refresh_orders)",
+}
+
+# Product_Sales has no date in its key, so recomputing a stale product would reread
+# its whole history. Its measures are additive: the loader subtracts the touched
+# orders' contribution (sign -1) before changing them and adds it back (sign +1)
+# afterwards. Expects the touched order ids in temp.touched_orders.
+PRODUCT_SALES_DELTA = """
+INSERT INTO Product_Sales
+WITH order_reviews AS (
+    SELECT order_id, TOTAL(rating) AS rating_sum, COUNT(rating) AS rating_count
+    FROM Reviews
+    WHERE order_id IN (SELECT order_id FROM temp.touched_orders)
+    GROUP BY order_id
+)
+SELECT
+    c.country,
+    p.product_id,
+    p.category,
+    :sign * SUM(oi.quantity) AS sales_volume,
+    :sign * TOTAL(r.rating_sum) AS rating_sum,
+    :sign * TOTAL(r.rating_count) AS rating_count
+FROM temp.touched_orders t
+CROSS JOIN Order_Items oi ON oi.order_id = t.order_id
+CROSS JOIN Orders o ON oi.order_id = o.order_id
+CROSS JOIN Customers c ON o.customer_id = c.customer_id
+CROSS JOIN Products p ON oi.product_id = p.product_id
+LEFT JOIN order_reviews r ON oi.order_id = r.order_id
+GROUP BY c.country, p.product_id
+ON CONFLICT (country, product_id) DO UPDATE SET
+    category = excluded.category,
+    sales_volume = Product_Sales.sales_volume + excluded.sales_volume,
+    rating_sum = Product_Sales.rating_sum + excluded.rating_sum,
+    rating_count = Product_Sales.rating_count + excluded.rating_count;
+"""
+
+# Groups left without any item once the touched orders have been added back
+PRODUCT_SALES_PRUNE = """
+DELETE FROM Product_Sales
+WHERE sales_volume = 0 AND NOT EXISTS (
+    SELECT 1 FROM Order_Items oi
+    JOIN Orders o ON oi.order_id = o.order_id
+    JOIN Customers c ON o.customer_id = c.customer_id
+    WHERE oi.product_id = Product_Sales.product_id AND c.country = Product_Sales.country
+);
+"""
+
+# --- DATA VERSION ---
+# Every load bumps the version. Incremental loads record the (country, year, month)
+# groups they changed in Data_Changes, so dashboard workers can drop only the
+# figures that read them; a full build starts a new build_id and version 1.
+DATA_VERSION_DDL = """
+DROP TABLE IF EXISTS Data_Version;
+CREATE TABLE Data_Version (
+    version     INTEGER PRIMARY KEY,
+    build_id    TEXT    NOT NULL,
+    loaded_at   TEXT    NOT NULL
+);
+DROP TABLE IF EXISTS Data_Changes;
+CREATE TABLE Data_Changes (
+    version     INTEGER NOT NULL,
+    country     TEXT    NOT NULL,
+    year        INTEGER NOT NULL,
+    month       INTEGER NOT NULL,
+    PRIMARY KEY (version, country, year, month)
+) WITHOUT ROWID;
+"""
+
+VERSION_TABLES = ['Data_Version', 'Data_Changes']
+
+
+# Recreate the rollup tables, then fill them in one transaction
+def build_rollups(conn):
+    conn.executescript(MONTHLY_SALES_DDL + MONTHLY_ORDERS_DDL + DAILY_ORDERS_DDL + PRODUCT_SALES_DDL
+                       + DATA_VERSION_DDL)
+    with conn:
+        conn.execute(MONTHLY_SALES_FILL.format(**FULL_SCOPE))
+        conn.execute(MONTHLY_ORDERS_FILL.format(**FULL_SCOPE))
+        conn.execute(DAILY_ORDERS_FILL.format(**FULL_SCOPE))
+        conn.execute(PRODUCT_SALES_FILL)
+        fill_filter_options(conn)
+        conn.execute("INSERT INTO Data_Version VALUES (1, ?, datetime('now'))", (uuid.uuid4().hex,))
+    # Planner statistics; without them incremental refreshes can pick nested scans
+    conn.execute("ANALYZE;")
+
+
+# Daily_Orders for the stale groups; built in full in a database from before the table
+def refresh_daily_orders(conn):
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'Daily_Orders'").fetchone() is None:
+        for statement in DAILY_ORDERS_DDL.split(';'):
+            if statement.strip():
+                conn.execute(statement)
+        conn.execute(DAILY_ORDERS_FILL.format(**FULL_SCOPE))
+        return
+    conn.execute("""DELETE FROM Daily_Orders WHERE (country, year, month) IN
+                    (SELECT country, year, month FROM temp.stale_months)""")
+    conn.execute(DAILY_ORDERS_FILL.format(**MONTH_SCOPE))
+
+
+# Rewrite the dropdown options from the current Orders and Customers
+def fill_filter_options(conn):
+    for statement in FILTER_OPTIONS_FILL:
+        conn.execute(statement)
+
+
+# Add (sign=1) or subtract (sign=-1) the orders in temp.touched_orders from Product_Sales
+def apply_product_delta(conn, sign):
+    conn.execute(PRODUCT_SALES_DELTA, {'sign': sign})
+    if sign > 0:
+        conn.execute(PRODUCT_SALES_PRUNE)
+
+
+# Recompute only the given (country, year, month) groups of the monthly tables and
+# bump the data version. Runs inside the caller's transaction, so readers see the
+# load and its rollups together. Returns the new version.
+def refresh_rollups(conn, months):
+    for statement in STALE_DDL.split(';'):
+        if statement.strip():
+            conn.execute(statement)
+    conn.executemany("INSERT OR IGNORE INTO temp.stale_months VALUES (?, ?, ?)", months)
+    conn.execute(REFRESH_ORDERS_FILL)
+
+    conn.execute("""DELETE FROM Monthly_Sales WHERE (country, year, month) IN
+                    (SELECT country, year, month FROM temp.stale_months)""")
+    conn.execute("""DELETE FROM Monthly_Orders WHERE (country, year, month) IN
+                    (SELECT country, year, month FROM temp.stale_months)""")
+    conn.execute(MONTHLY_SALES_FILL.format(**MONTH_SCOPE))
+    conn.execute(MONTHLY_ORDERS_FILL.format(**MONTH_SCOPE))
+    refresh_daily_orders(conn)
+    # A load can add a year or a country (or, by moving customers, remove one)
+    fill_filter_options(conn)
+
+    version, build_id = conn.execute(
+        "SELECT version, build_id FROM Data_Version ORDER BY version DESC LIMIT 1").fetchone()
+    conn.execute("INSERT INTO Data_Version VALUES (?, ?, datetime('now'))", (version + 1, build_id))
+    conn.execute("""INSERT INTO Data_Changes
+                    SELECT ?, country, year, month FROM temp.stale_months""", (version + 1,))
+    return version + 1
+
+
+if __name__ == '__main__':
+    # Usage: python db_rollup.py [path/to/ecommerce_project.db]
+    db_name = sys.argv[1] if len(sys.argv) > 1 else "ecommerce_project.db"
+    conn = sqlite3.connect(db_name)
+    build_rollups(conn)
+    conn.close()
+
+    print(f"Successfully built rollup tables in {db_name}!")
+    print(f"Tables created: {', '.join(ROLLUP_TABLES + VERSION_TABLES)}")
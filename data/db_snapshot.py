@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# The layout is the columnar store's: build it with the store's own code
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DATA_DIR))
+from columnar import fact_columns, FACT_COLUMNS, SNAPSHOT_LAYOUT
+from db_service import snapshot_path, sql_path
+
+# --- COLUMNAR SNAPSHOT ---
+# Writes the order-item fact table (sql/load_fact_table.sql) next to the database
+# as an uncompressed Arrow IPC file, ecommerce_project.arrow, in the layout the
+# dashboard's columnar store uses (columnar.fact_columns): rows sorted by
+# (country, month), countries / categories / products as integer codes into
+# sorted lists, booleans as uint8 and the order-grain flags precomputed. The
+# dimension lists and the data version go in the file's metadata.
+#
+# With DASHBOARD_BACKEND=arrow every worker memory-maps this file instead of
+# loading its own copy of the fact table: the columns are used in place, the
+# page cache holds one copy for all workers, and a chart only reads the pages
+# of the columns it aggregates. Arrow IPC rather than Parquet because Parquet
+# pages must be decoded into memory before use. Needs pyarrow.
+
+DEFAULT_DB = os.path.join(os.path.dirname(DATA_DIR), 'ecommerce_project.db')
+# Read from the file: db_service.extract_query_from_file validates the queries
+# against the dashboard's own database, not the one being snapshotted
+FACT_QUERY = os.path.join(sql_path, 'load_fact_table.sql')
+
+
+# ({column: array}, metadata) of the fact table in an open database
+def snapshot_columns(conn):
+    with open(FACT_QUERY, 'r') as file:
+        df = pd.read_sql_query(file.read(), conn)
+    columns, dimensions = fact_columns(df)
+    # Arrow booleans are bit-packed; uint8 columns map without a copy
+    columns = {name: values.view(np.uint8) if FACT_COLUMNS[name] is np.bool_ else values
+               for name, values in columns.items()}
+
+    version = conn.execute("SELECT build_id, version FROM Data_Version ORDER BY version DESC LIMIT 1").fetchone()
+    metadata = {'layout': SNAPSHOT_LAYOUT, 'data_version': list(version) if version else None, **dimensions}
+    return columns, metadata
+
+
+# Write the snapshot of an open database; returns the number of rows, or None
+# without pyarrow. The file is replaced atomically, so workers that still map
+# the old one keep reading it until they reload.
+def write_snapshot(conn, db_path):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print("Snapshot skipped: pyarrow is not installed (needed for DASHBOARD_BACKEND=arrow).")
+        return None
+
+    columns, metadata = snapshot_columns(conn)
+    table = pa.table({name: pa.array(values) for name, values in columns.items()})
+    table = table.replace_schema_metadata({'dashboard': json.dumps(metadata)})
+
+    path = snapshot_path(db_path)
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        # Built from one array per column, so this is a single record batch
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+    return table.num_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the columnar snapshot of the dashboard database.")
+    parser.add_argument('--db', default=DEFAULT_DB, help="SQLite database to read (default: ecommerce_project.db)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(args.db)
+    rows = write_snapshot(conn, args.db)
+    conn.close()
+    if rows is None:
+        raise SystemExit(1)
+    print(f"Wrote {rows:,} rows to {snapshot_path(args.db)} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from db_mod import DEFAULT_CHUNKSIZE, bulk_load, create_schema, insert_sql
+from db_rollup import build_rollups
+
+# --- SYNTHETIC DATA GENERATOR ---
+# Builds a consistent Customers / Orders / Products / Order_Items / Reviews data
+# set of any size for scale benchmarks. Every table is generated with NumPy, one
+# chunk of orders at a time, and written straight to SQLite (schema.sql plus the
+# rollup tables) or to one Parquet file per table; no denormalized frame is built.
+# Output depends only on the arguments: each chunk draws from its own generator
+# seeded with (seed, table, chunk number).
+
+COUNTRIES = ['USA', 'China', 'UK', 'Germany', 'Japan', 'France', 'Canada', 'India', 'Brazil', 'Australia']
+CATEGORIES = ['Electronics', 'Apparel', 'Home & Kitchen', 'Books', 'Sports', 'Toys']
+STATUSES = ['Delivered', 'Shipped', 'Pending', 'Cancelled', 'Returned']
+AGE_GROUPS = ['Teenagers', 'Adults', 'Senior']
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda',
+               'David', 'Elizabeth', 'William', 'Susan', 'Richard', 'Jessica', 'Joseph', 'Sarah']
+
+# Shape of the data set, close to data/ecommerce_dataset_10000.csv
+ITEMS_PER_ORDER = 1.25
+ORDERS_PER_CUSTOMER = 2.5
+PRODUCTS_PER_CATEGORY = 3
+COUNTRY_SKEW = 0.8        # country i gets weight 1 / (i + 1) ** COUNTRY_SKEW
+SIGNUP_LEAD_DAYS = 730    # customers sign up within two years before the first order date
+REVIEW_LAG_DAYS = 30      # reviews arrive up to a month after delivery
+
+DEFAULT_START = '2022-01-01'
+DEFAULT_END = '2025-12-31'
+TABLE_SEEDS = {'Customers': 1, 'Products': 2, 'Orders': 3}
+
+
+# The first n names of a list, continued as "<prefix> <i>" past its end
+def _names(base, n, prefix):
+    return np.array(base[:n] + [f"{prefix} {i}" for i in range(len(base) + 1, n + 1)], dtype=object)
+
+
+# 'PREFIX<i>' ids for a range of integers
+def _ids(prefix, values):
+    return np.char.add(prefix, values.astype(str)).astype(object)
+
+
+def _iso(days):
+    return np.datetime_as_string(days, unit='D').astype(object)
+
+
+# (first, stop) bounds of every chunk of `total` rows
+def _chunks(total, chunksize):
+    for first in range(0, total, chunksize):
+        yield first, min(first + chunksize, total)
+
+
+class SyntheticData:
+    def __init__(self, rows, countries=len(COUNTRIES), categories=len(CATEGORIES), products=None,
+                 start=DEFAULT_START, end=DEFAULT_END, seed=42, chunksize=DEFAULT_CHUNKSIZE):
+        self.n_items = rows
+        self.n_orders = max(1, min(rows, round(rows / ITEMS_PER_ORDER)))
+        self.n_customers = max(1, round(self.n_orders / ORDERS_PER_CUSTOMER))
+        self.countries = _names(COUNTRIES, countries, "Country")
+        self.categories = _names(CATEGORIES, categories, "Category")
+        self.n_products = products or categories * PRODUCTS_PER_CATEGORY
+        self.start = np.datetime64(start, 'D')
+        self.span = int((np.datetime64(end, 'D') - self.start).astype(int)) + 1
+        self.seed = seed
+        self.chunksize = chunksize
+
+        weights = 1.0 / np.arange(1, countries + 1) ** COUNTRY_SKEW
+        self.country_weights = weights / weights.sum()
+        self.product_price = self._rng('Products', 0).integers(10, 1000, self.n_products).astype(np.float64)
+
+    def _rng(self, table, chunk):
+        return np.random.default_rng([self.seed, TABLE_SEEDS[table], chunk])
+
+    # Items before order i: orders are spread evenly over the item rows
+    def _items_before(self, order):
+        return order * self.n_items // self.n_orders
+
+    def products(self):
+        ids = np.arange(self.n_products)
+        yield 'Products', {
+            'product_id': _ids('PROD', ids + 100),
+            'product_name': _ids('Product ', ids + 100),
+            'category': self.categories[ids % len(self.categories)],
+        }
+
+    def customers(self):
+        for chunk, (first, stop) in enumerate(_chunks(self.n_customers, self.chunksize)):
+            rng = self._rng('Customers', chunk)
+            n = stop - first
+            signup = self.start - rng.integers(0, SIGNUP_LEAD_DAYS, n).astype('timedelta64[D]')
+            yield 'Customers', {
+                'customer_id': _ids('CUST', np.arange(first, stop)),
+                'first_name': np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), n)],
+                'country': self.countries[rng.choice(len(self.countries), n, p=self.country_weights)],
+                'age_group': np.array(AGE_GROUPS, dtype=object)[rng.integers(0, len(AGE_GROUPS), n)],
+                'signup_date': signup,
+            }
+
+    # Orders with their items and one review each, a chunk of orders at a time
+    def orders(self):
+        for chunk, (first, stop) in enumerate(_chunks(self.n_orders, self.chunksize)):
+            rng = self._rng('Orders', chunk)
+            n = stop - first
+            order_ids = _ids('ORD', np.arange(first, stop))
+
+            order_day = self.start + rng.integers(0, self.span, n).astype('timedelta64[D]')
+            delivery_day = order_day + rng.integers(2, 8, n).astype('timedelta64[D]')
+            months = order_day.astype('datetime64[M]').astype(np.int64)
+            yield 'Orders', {
+                'order_id': order_ids,
+                'customer_id': _ids('CUST', rng.integers(0, self.n_customers, n)),
+                'order_date': order_day,
+                'delivery_date': delivery_day,
+                'order_status': np.array(STATUSES, dtype=object)[rng.integers(0, len(STATUSES), n)],
+                'order_year': months // 12 + 1970,
+                'order_month': months % 12 + 1,
+            }
+
+            # Every order has one item; the chunk's remaining items go to random orders in it
+            first_item = self._items_before(first)
+            n_items = self._items_before(stop) - first_item
+            item_order = np.sort(np.concatenate([np.arange(n), rng.integers(0, n, n_items - n)]))
+            item_product = rng.integers(0, self.n_products, n_items)
+            yield 'Order_Items', {
+                'order_item_id': np.arange(first_item + 1, first_item + n_items + 1),
+                'order_id': order_ids[item_order],
+                'product_id': _ids('PROD', item_product + 100),
+                'quantity': rng.integers(1, 6, n_items),
+                'unit_price': self.product_price[item_product],
+            }
+
+            yield 'Reviews', {
+                'review_id': _ids('REV', np.arange(first, stop)),
+                'order_id': order_ids,
+                'rating': rng.integers(1, 6, n),
+                'review_date': delivery_day + rng.integers(0, REVIEW_LAG_DAYS + 1, n).astype('timedelta64[D]'),
+            }
+
+    # (table, {column: array}) chunks, parent tables first
+    def tables(self):
+        yield from self.products()
+        yield from self.customers()
+        yield from self.orders()
+
+
+# --- WRITERS ---
+
+def write_sqlite(data, path):
+    conn = sqlite3.connect(path)
+    create_schema(conn, indexes=False)
+    with bulk_load(conn):
+        for table, columns in data.tables():
+            values = [_iso(col) if col.dtype.kind == 'M' else col for col in columns.values()]
+            conn.executemany(insert_sql(table, list(columns)), zip(*(col.tolist() for col in values)))
+    build_rollups(conn)
+    conn.close()
+
+
+# One <table>.parquet per table, written a row group per chunk (needs pyarrow)
+def write_parquet(data, directory):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("--parquet needs pyarrow: pip install pyarrow")
+
+    os.makedirs(directory, exist_ok=True)
+    writers = {}
+    try:
+        for table, columns in data.tables():
+            batch = pa.table({name: pa.array(col) for name, col in columns.items()})
+            if table not in writers:
+                writers[table] = pq.ParquetWriter(os.path.join(directory, f"{table}.parquet"), batch.schema)
+            writers[table].write_table(batch)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dashboard data set for scale benchmarks.")
+    parser.add_argument('--rows', type=int, required=True, help="order item rows, e.g. 10000 to 50000000")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--db', help="SQLite database to create, with the rollup tables")
+    output.add_argument('--parquet', metavar='DIR', help="directory for one <table>.parquet per table")
+    parser.add_argument('--countries', type=int, default=len(COUNTRIES), help=f"default: {len(COUNTRIES)}")
+    parser.add_argument('--categories', type=int, default=len(CATEGORIES), help=f"default: {len(CATEGORIES)}")
+    parser.add_argument('--products', type=int, help=f"default: {PRODUCTS_PER_CATEGORY} per category")
+    parser.add_argument('--start', default=DEFAULT_START, help=f"first order date (default: {DEFAULT_START})")
+    parser.add_argument('--end', default=DEFAULT_END, help=f"last order date (default: {DEFAULT_END})")
+    parser.add_argument('--seed', type=int, default=42, help="random seed (default: 42)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"orders generated per chunk (default: {DEFAULT_CHUNKSIZE})")
+    args = parser.parse_args()
+    if args.rows < 1 or args.countries < 1 or args.categories < 1:
+        parser.error("--rows, --countries and --categories must be positive")
+    if np.datetime64(args.end, 'D') < np.datetime64(args.start, 'D'):
+        parser.error(f"--end {args.end} is before --start {args.start}")
+
+    data = SyntheticData(args.rows, args.countries, args.categories, args.products,
+                         args.start, args.end, args.seed, args.chunksize)
+
+    started = time.perf_counter()
+    if args.db:
+        write_sqlite(data, args.db)
+    else:
+        write_parquet(data, args.parquet)
+    seconds = time.perf_counter() - started
+
+    print(f"Generated {data.n_items:,} items, {data.n_orders:,} orders, {data.n_customers:,} customers "
+          f"in {seconds:.2f}s ({data.n_items / max(seconds, 1e-9):,.0f} rows/s)")
+    print(f"Written to {args.db or args.parquet}")
+
+
+if __name__ == '__main__':
+    main()
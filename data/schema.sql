@@ -0,0 +1,59 @@
+-- Schema for ecommerce_project.db
+-- Dates are stored as ISO-8601 'YYYY-MM-DD' text; Orders also carries
+-- integer order_year / order_month so year filters can use an index.
+
+DROP TABLE IF EXISTS Reviews;
+DROP TABLE IF EXISTS Order_Items;
+DROP TABLE IF EXISTS Orders;
+DROP TABLE IF EXISTS Products;
+DROP TABLE IF EXISTS Customers;
+
+CREATE TABLE Customers (
+    customer_id     TEXT    PRIMARY KEY,
+    first_name      TEXT,
+    country         TEXT    NOT NULL,
+    age_group       TEXT,
+    signup_date     DATE
+);
+
+CREATE TABLE Products (
+    product_id      TEXT    PRIMARY KEY,
+    product_name    TEXT,
+    category        TEXT    NOT NULL
+);
+
+CREATE TABLE Orders (
+    order_id        TEXT    PRIMARY KEY,
+    customer_id     TEXT    NOT NULL REFERENCES Customers (customer_id),
+    order_date      DATE    NOT NULL,
+    delivery_date   DATE,
+    order_status    TEXT    NOT NULL,
+    order_year      INTEGER NOT NULL,
+    order_month     INTEGER NOT NULL
+);
+
+CREATE TABLE Order_Items (
+    order_item_id   INTEGER PRIMARY KEY,
+    order_id        TEXT    NOT NULL REFERENCES Orders (order_id),
+    product_id      TEXT    NOT NULL REFERENCES Products (product_id),
+    quantity        INTEGER NOT NULL,
+    unit_price      REAL    NOT NULL
+);
+
+CREATE TABLE Reviews (
+    review_id       TEXT    PRIMARY KEY,
+    order_id        TEXT    NOT NULL REFERENCES Orders (order_id),
+    rating          INTEGER,
+    review_date     DATE
+);
+
+-- Foreign-key indexes
+CREATE INDEX idx_orders_customer_year ON Orders (customer_id, order_year, order_month);
+CREATE INDEX idx_order_items_order ON Order_Items (order_id);
+CREATE INDEX idx_order_items_product ON Order_Items (product_id);
+CREATE INDEX idx_reviews_order ON Reviews (order_id);
+
+-- Filter indexes: country lookups and the (country, year) dropdown filters
+CREATE INDEX idx_customers_country ON Customers (country, customer_id);
+CREATE INDEX idx_orders_year_month ON Orders (order_year, order_month);
+CREATE INDEX idx_products_category ON Products (category, product_id);
@@ -1,22 +1,293 @@
+import functools
+import itertools
 import os
+import queue
+import re
 import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.request import pathname2url
 import pandas as pd
 
-db_name = "ecommerce_project.db"
-sql_path = "sql/"
+from metrics import observe_query
 
-# Create a function to get a database connection
+# Paths are resolved relative to this file so workers can start from any directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+db_name = os.path.join(BASE_DIR, "ecommerce_project.db")
+sql_path = os.path.join(BASE_DIR, "sql")
+
+# Set SQL_RELOAD=1 during development to pick up edited .sql files without a restart
+SQL_RELOAD = os.environ.get("SQL_RELOAD", "") not in ("", "0")
+
+# Where the dashboard reads its data from: 'sqlite' (query ecommerce_project.db),
+# 'memory' (load the fact table from it once per worker) or 'arrow' (memory-map
+# the ecommerce_project.arrow snapshot, shared by all workers); see columnar.py
+DATA_BACKEND = os.environ.get("DASHBOARD_BACKEND", "sqlite")
+COLUMNAR_BACKENDS = ('memory', 'arrow')
+
+# --- CONNECTION POOL SETTINGS ---
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "4"))
+CACHED_STATEMENTS = 64
+CONNECTION_PRAGMAS = {
+    'query_only': 'ON',
+    'mmap_size': 256 * 1024 * 1024,   # bytes
+    'cache_size': -64 * 1024,         # negative = KiB
+    'temp_store': 'MEMORY',
+}
+
+
+# Identify the current database contents by file size and modification time
+def db_fingerprint(database=None):
+    try:
+        st = os.stat(database or db_name)
+    except FileNotFoundError:
+        return "missing"
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+# Open a read-only connection with the tuned PRAGMAs applied
+def _open_connection(database):
+    uri = f"file:{pathname2url(database)}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                           cached_statements=CACHED_STATEMENTS)
+    for name, value in CONNECTION_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value};")
+    return conn
+
+
+# Thread-safe pool of read-only connections, one pool per worker process.
+# A pool inherited through fork() is discarded and refilled in the child.
+class ConnectionPool:
+    def __init__(self, database, size=POOL_SIZE):
+        self.database = database
+        self.size = size
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._created = 0
+
+    def acquire(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return _open_connection(self.database)
+                except sqlite3.Error:
+                    self._created -= 1
+                    raise
+        # Pool exhausted: wait for another thread to give one back
+        return self._idle.get()
+
+    def release(self, conn, broken=False):
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            if broken:
+                self._created -= 1
+                conn.close()
+                return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except sqlite3.DatabaseError:
+            self.release(conn, broken=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._created = 0
+
+
+pool = ConnectionPool(db_name)
+
+
+# Columnar snapshot written next to the database by data/db_snapshot.py
+def snapshot_path(database=None):
+    return os.path.splitext(database or db_name)[0] + ".arrow"
+
+
+# Borrow a pooled connection: `with borrow_connection() as conn: ...`
+def borrow_connection():
+    return pool.connection()
+
+
+# Create a function to get a (new, unpooled) database connection
 def get_connection():
-    conn = sqlite3.connect(db_name)
+    conn = _open_connection(db_name)
     return conn
 
-# Function to extract the query from SQL file
+
+# Run a sql/ query on a pooled connection with the given filters, e.g.
+# read_query("get_customer_matrix.sql", year=2024, country=None); the variant
+# without the unset filters' lines is executed (see query_variant). Returns a
+# DataFrame, or None if the query file could not be read. Timed in metrics.py.
+def read_query(filename, **filters):
+    query = extract_query_from_file(filename)
+    if query is None:
+        return None
+    given = frozenset(name for name, value in filters.items() if value is not None)
+    with observe_query(filename) as rows:
+        with borrow_connection() as conn:
+            df = pd.read_sql_query(query_variant(query, given), conn, params=filters)
+        rows(len(df))
+    return df
+
+
+# --- DATA VERSION ---
+# Written by data/db_rollup.py (new build_id, version 1) and bumped by every
+# data/db_mod.py --incremental load, which logs the (country, year) groups it changed.
+
+# (build_id, version) of the current data, or None for a database without Data_Version
+def data_version():
+    try:
+        with borrow_connection() as conn:
+            row = conn.execute(
+                "SELECT build_id, version FROM Data_Version ORDER BY version DESC LIMIT 1"
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return tuple(row) if row else None
+
+
+# (version, country, year) groups changed after the given version, oldest first
+def data_changes(since=0):
+    with borrow_connection() as conn:
+        return conn.execute(
+            "SELECT DISTINCT version, country, year FROM Data_Changes WHERE version > ? ORDER BY version",
+            (since,),
+        ).fetchall()
+
+# --- SQL TEXT CACHE ---
+# filename -> (mtime, query text); filled once by load_queries()
+_query_cache = {}
+_query_lock = threading.Lock()
+
+
+# --- QUERY VARIANTS ---
+# A line ending in "-- if <name>" is an optional filter: it is kept only when
+# the <name> filter is given, so "all countries" and "one country" each get SQL
+# that SQLite can plan on its own (an index seek or a plain scan) instead of a
+# catch-all "(:country IS NULL OR country = :country)" that always scans.
+OPTIONAL_LINE = re.compile(r"^(.*?)\s*--\s*if\s+(\w+)\s*$")
+NAMED_PARAMETER = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+# Names of the optional filters of a query
+def query_filters(query):
+    return sorted({m.group(2) for m in map(OPTIONAL_LINE.match, query.splitlines()) if m})
+
+
+# The query text for a set of given filters; the same text for the same filters,
+# so SQLite's statement cache holds one prepared statement per variant
+@functools.lru_cache(maxsize=256)
+def query_variant(query, given=frozenset()):
+    lines = []
+    for line in query.splitlines():
+        match = OPTIONAL_LINE.match(line)
+        if match is None:
+            lines.append(line)
+        elif match.group(2) in given:
+            lines.append(match.group(1))
+    return "\n".join(lines)
+
+
+# Every variant of a query: (given filters, query text)
+def query_variants(query):
+    names = query_filters(query)
+    for n in range(len(names) + 1):
+        for given in itertools.combinations(names, n):
+            given = frozenset(given)
+            yield given, query_variant(query, given)
+
+
+# Check that every variant of a query compiles against the current schema without running it
+def validate_query(conn, query):
+    for _, variant in query_variants(query):
+        text = strip_sql_comments(variant)
+        names = NAMED_PARAMETER.findall(text)
+        placeholders = dict.fromkeys(names) if names else (None,) * text.count('?')
+        conn.execute("EXPLAIN " + variant, placeholders).fetchall()
+
+
+def strip_sql_comments(query):
+    return re.sub(r"--[^\n]*", "", query)
+
+
+def _read_query(filename):
+    path = os.path.join(sql_path, filename)
+    mtime = os.path.getmtime(path)
+    with open(path, 'r') as file:
+        query = file.read()
+    return mtime, query
+
+
+# Read (and optionally validate) every .sql file in sql/ into memory
+def load_queries(validate=True):
+    loaded = {}
+    for filename in sorted(os.listdir(sql_path)):
+        if filename.endswith(".sql"):
+            loaded[filename] = _read_query(filename)
+
+    if validate:
+        with borrow_connection() as conn:
+            for filename, (mtime, query) in list(loaded.items()):
+                try:
+                    validate_query(conn, query)
+                except sqlite3.Error as e:
+                    print(f"Error: The query in {filename} is invalid: {e}")
+                    del loaded[filename]
+
+    with _query_lock:
+        _query_cache.clear()
+        _query_cache.update(loaded)
+    return list(loaded)
+
+
+# Function to extract the query from SQL file (served from the in-memory cache)
 def extract_query_from_file(filename):
-    sql_path = os.path.join("sql", filename)
+    if not _query_cache:
+        load_queries()
+
+    cached = _query_cache.get(filename)
+    if cached is not None and not SQL_RELOAD:
+        return cached[1]
+
+    # Reload mode, or a file added after startup: check the file on disk
     try:
-        with open(sql_path, 'r') as file:
-            query = file.read()
-        return query
+        mtime = os.path.getmtime(os.path.join(sql_path, filename))
+        if cached is None or mtime != cached[0]:
+            cached = _read_query(filename)
+            with borrow_connection() as conn:
+                validate_query(conn, cached[1])
+            with _query_lock:
+                _query_cache[filename] = cached
+        return cached[1]
     except FileNotFoundError:
         print(f"Error: The file {filename} was not found.")
         return None
+    except sqlite3.Error as e:
+        print(f"Error: The query in {filename} is invalid: {e}")
+        return None
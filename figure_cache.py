@@ -0,0 +1,214 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from plotly.io.json import to_json_plotly
+
+from builds import build_pool
+from db_service import db_fingerprint, data_version, data_changes
+
+# --- FIGURE CACHE SETTINGS ---
+CACHE_MAXSIZE = int(os.environ.get("FIGURE_CACHE_SIZE", "256"))
+CACHE_TTL = float(os.environ.get("FIGURE_CACHE_TTL", "3600"))  # seconds, 0 = no expiry
+# Optional directory shared by all gunicorn workers on the same host
+CACHE_DIR = os.environ.get("FIGURE_CACHE_DIR") or None
+
+
+# Bounded LRU cache of rendered figure dicts with a TTL, keyed on (function, filter values).
+# Every entry remembers the data version it was built from and its scope, the
+# (countries, years) of the data behind it with None meaning all. When the
+# database file changes the cache reads the new data version: an incremental
+# load only makes the entries whose scope overlaps the changed groups stale,
+# a rebuild (new build_id, or no Data_Version table) drops everything.
+# Figures are shared between callers and must not be modified.
+class FigureCache:
+    def __init__(self, maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL, disk_dir=CACHE_DIR):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._fingerprint = None
+        self._build_id = None
+        self._version = 0
+        self._changes = []   # (version, country, year), oldest first
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0,
+                      'invalidations': 0, 'stale': 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        # The data version is first read by the first get(), not at import
+
+    # Poll the database file; on a change, follow the data version
+    def _check_fingerprint(self):
+        fingerprint = db_fingerprint()
+        if fingerprint == self._fingerprint:
+            return
+        self._fingerprint = fingerprint
+
+        current = data_version()
+        if current is not None and current[0] == self._build_id and current[1] >= self._version:
+            if current[1] > self._version:
+                self._changes.extend(data_changes(self._version))
+                self._version = current[1]
+            return
+
+        # First check, rebuilt database, or no version table: start over
+        if current is None:
+            self._build_id, self._version, self._changes = fingerprint, 0, []
+        else:
+            self._build_id, self._version = current
+            self._changes = data_changes(0)
+        if self._entries:
+            self._entries.clear()
+            self.stats['invalidations'] += 1
+        self._purge_disk()
+
+    def _expired(self, stored_at):
+        return self.ttl > 0 and time.time() - stored_at > self.ttl
+
+    # True if a group inside the scope changed after the given version
+    def _stale(self, version, scope):
+        countries, years = scope
+        for changed, country, year in reversed(self._changes):
+            if changed <= version:
+                break
+            if (countries is None or country in countries) and (years is None or year in years):
+                return True
+        return False
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.disk_dir, f"{self._build_id}_{digest}.json")
+
+    def _purge_disk(self):
+        if not self.disk_dir:
+            return
+        for filename in os.listdir(self.disk_dir):
+            if not filename.startswith(self._build_id + "_"):
+                try:
+                    os.remove(os.path.join(self.disk_dir, filename))
+                except OSError:
+                    pass
+
+    # (version, figure) from the shared directory, or None
+    def _read_disk(self, path):
+        try:
+            if self._expired(os.path.getmtime(path)):
+                return None
+            with open(path, 'r') as file:
+                stored = json.load(file)
+            return stored['version'], stored['figure']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_disk(self, path, version, fig):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as file:
+                file.write(f'{{"version": {version}, "figure": {to_json_plotly(fig)}}}')
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    # Return the cached figure, or None on a miss. `scope` is the
+    # (countries, years) the figure depends on, None meaning all data.
+    def get(self, key, scope=(None, None)):
+        with self._lock:
+            self._check_fingerprint()
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[0]):
+                if not self._stale(entry[1], scope):
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry[2]
+                self.stats['stale'] += 1
+            if entry is not None:
+                del self._entries[key]
+            path = self._disk_path(key) if self.disk_dir else None
+
+        stored = self._read_disk(path) if path else None
+        with self._lock:
+            if stored is None or self._stale(stored[0], scope):
+                self.stats['misses'] += 1
+                return None
+            self.stats['disk_hits'] += 1
+            self._store(key, *stored)
+        return stored[1]
+
+    def _store(self, key, version, fig):
+        self._entries[key] = (time.time(), version, fig)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    # (build_id, version) to pass to set() for a figure about to be built
+    def version(self):
+        with self._lock:
+            return self._build_id, self._version
+
+    # `built_from` is version() as read before the figure was built; a figure
+    # built from an older build is not stored
+    def set(self, key, fig, built_from=None):
+        with self._lock:
+            self._check_fingerprint()
+            build_id, version = built_from or (self._build_id, self._version)
+            if build_id != self._build_id:
+                return
+            self._store(key, version, fig)
+            path = self._disk_path(key) if self.disk_dir else None
+        if path:
+            self._write_disk(path, version, fig)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        with self._lock:
+            return dict(self.stats, size=len(self._entries), maxsize=self.maxsize,
+                        build_id=self._build_id, data_version=self._version)
+
+
+figure_cache = FigureCache()
+
+
+# Decorator: memoize a visual.py builder on its (function, filter values).
+# `scope` maps the bound arguments to the (countries, years) the figure reads;
+# without one the figure goes stale on any data change.
+def cached_figure(func=None, *, scope=None):
+    if func is None:
+        return functools.partial(cached_figure, scope=scope)
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__name__,) + tuple(bound.arguments.values())
+
+        fig = figure_cache.get(key, scope(bound.arguments) if scope else (None, None))
+        if fig is not None:
+            return fig
+
+        def build():
+            built_from = figure_cache.version()
+            fig = func(*args, **kwargs)
+            if fig is not None:
+                figure_cache.set(key, fig, built_from)
+            return fig
+
+        # In the request thread, or in the background build pool (see builds.py)
+        return build_pool.run(key, build)
+
+    return wrapper
+
+
+# Hit/miss counters for monitoring
+def cache_stats():
+    return figure_cache.info()
@@ -1,33 +1,26 @@
 # Import Dash core libraries
-from dash import Dash, dcc, html, Input, Output, callback
-
-# Import data manipulation and visualization libraries
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from dash import Dash, dcc, html, Input, Output, State, Patch, callback, ctx, no_update
+from dash.exceptions import PreventUpdate
 
 # Import additional utilities
-import sqlite3
-import numpy as np
-from datetime import datetime
+import uuid
 
 # Import Visualization functions from visual.py
 from visual import get_product_performance, get_country_list, get_service_quality, get_global_revenue, get_year_list, get_customer_matrix_plot
+from visual import get_service_quality_zoomed
+from figure_cache import cache_stats, figure_cache
+from builds import build_pool
+from metrics import render_metrics, record_payload, timed_callback
+from warmup import warmup
+from theme import THEME
+from render import render_empty, figure_patch
 
-# Data fetching
-country_options = get_country_list()
-year_options = get_year_list()
+# Nothing here reads the database at import: the sql/ queries are loaded and
+# validated on first use, and the dropdown options are read (and cached, see
+# visual.FilterOptions) when a page is served
 
 # --- CSS STYLES CONFIGURATION ---
-THEME = {
-    'background': '#F0F2F5',      
-    'card_bg': '#FFFFFF',         
-    'primary': '#0052CC',         
-    'text': '#172B4D',            
-    'text_light': '#6B778C',      
-    'border': '#DFE1E6',          
-    'shadow': '0 4px 6px rgba(0, 0, 0, 0.1)' 
-}
+# THEME colors are shared with the figure templates in render.py
 
 
 graph_wrapper_style = {
@@ -80,225 +73,330 @@ header_style = {
 # Create a Dash application instance
 app = Dash(__name__)
 
-app.layout = html.Div(style={'backgroundColor': THEME['background'], 'fontFamily': 'Segoe UI, Roboto, Helvetica, Arial, sans-serif', 'minHeight': '100vh', 'padding': '20px'}, children=[
+# Figure cache hit/miss counters for monitoring, with the builds saved by
+# single-flight per builder (see builds.py)
+@app.server.route('/cache-stats')
+def figure_cache_stats():
+    return dict(cache_stats(), builds=build_pool.info())
+
+# Prometheus metrics: query / figure / callback timings and payload sizes of this worker
+@app.server.route('/metrics')
+def prometheus_metrics():
+    # The running totals (each object's stats) are counters; sizes, versions and settings are gauges
+    gauges, counters = {}, {}
+    for prefix, info, totals in (("dashboard_figure_cache", cache_stats(), figure_cache.stats),
+                                 ("dashboard_builds", build_pool.info(), build_pool.stats)):
+        for name, value in info.items():
+            if isinstance(value, (bool, int, float)):
+                (counters if name in totals else gauges)[f"{prefix}_{name}"] = int(value)
+    return render_metrics(gauges, counters), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+app.server.after_request(record_payload)
+
+# Readiness probe: 503 until the figure cache warm-up has finished
+@app.server.route('/ready')
+def readiness():
+    status = warmup.status()
+    return status, (200 if status['ready'] else 503)
+
+# The page, with the dropdown options of the current data
+def dashboard(year_options, country_options):
+    return html.Div(style={'backgroundColor': THEME['background'], 'fontFamily': 'Segoe UI, Roboto, Helvetica, Arial, sans-serif', 'minHeight': '100vh', 'padding': '20px'}, children=[
     
-    # --- HEADER ---
-    html.Div(style=header_style, children=[
-        html.Div([
-            # html.Span("📊", style={'fontSize': '32px', 'marginRight': '15px'}),
+        # --- HEADER ---
+        html.Div(style=header_style, children=[
             html.Div([
-                html.H1("3PY E-COMMERCE", style={
-                    'color': THEME['primary'], 
-                    'fontSize': '28px', 
-                    'marginBottom': '0', 
-                    'fontWeight': '800',
-                    'letterSpacing': '1px'
-                }),
-                html.P("Global Growth Dashboard: Strategic & Operational Overview", style={
-                    'color': THEME['text_light'], 
-                    'fontSize': '16px', 
-                    'marginTop': '5px',
-                    'fontWeight': '500'
-                })
-            ])
-        ], style={'display': 'flex', 'alignItems': 'center'})
-    ]),
+                # html.Span("📊", style={'fontSize': '32px', 'marginRight': '15px'}),
+                html.Div([
+                    html.H1("3PY E-COMMERCE", style={
+                        'color': THEME['primary'], 
+                        'fontSize': '28px', 
+                        'marginBottom': '0', 
+                        'fontWeight': '800',
+                        'letterSpacing': '1px'
+                    }),
+                    html.P("Global Growth Dashboard: Strategic & Operational Overview", style={
+                        'color': THEME['text_light'], 
+                        'fontSize': '16px', 
+                        'marginTop': '5px',
+                        'fontWeight': '500'
+                    })
+                ])
+            ], style={'display': 'flex', 'alignItems': 'center'})
+        ]),
 
-    # --- TABS ---
-    dcc.Tabs(style=tabs_styles, children=[
+        # --- TABS ---
+        dcc.Tabs(style=tabs_styles, children=[
         
-        # === TAB 1: STRATEGY ===
-        dcc.Tab(label='Strategy Overview', style=tab_style, selected_style=tab_selected_style, children=[
-            html.Div(style={'padding': '20px'}, children=[
-
-                # Filter: Global  Year Selection
-                html.Div(style=card_container_style, children=[
-                    html.Div([
-                        # html.Span("📅", style={'fontSize': '20px', 'marginRight': '10px'}),
-                        html.Label("Select Reporting Year:", style={'fontWeight': 'bold', 'marginRight': '15px'}),
-                        dcc.Dropdown(
-                            id='year-filter',
-                            options=year_options,
-                            value=year_options[0] if year_options else None, # Default to first year
-                            clearable=False,
-                            style={'width': '200px'}
-                        )
-                    ], style={'display': 'flex', 'alignItems': 'center'})
-                ]),
-                
-                # Card: Revenue Map
-                html.Div(style=card_container_style, children=[
-                    html.Div([
-                        html.Div([
-                            html.H2("Global Revenue Visualization", style={'fontSize': '22px', 'color': THEME['text'], 'marginBottom': '10px'}),
-                            html.P("Overview of total revenue and efficiency across different regions.", style={'color': THEME['text_light'], 'fontSize': '14px'})
-                        ], style={'width': '60%'}),
-                    ], style={'display': 'flex', 'justifyContent': 'space-between', 'alignItems': 'start', 'marginBottom': '20px'}),
-                    
-                    # Graph: Map wrapped in centering div
-                    html.Div(style=graph_wrapper_style, children=[
-                        dcc.Graph(
-                            id='global-revenue-graph',
-                            style={'height': '80vh'} 
-                        )
-                    ])
-                ]),
-                # Card: Customer Value Matrix
-                html.Div(style=card_container_style, children=[
-                    html.Div([
-                        html.Div([
-                            html.H2("Customer Value Matrix", style={'fontSize': '22px', 'color': THEME['text'], 'marginBottom': '10px'})
-                        ], style={'width': '60%'}),
+            # === TAB 1: STRATEGY ===
+            dcc.Tab(label='Strategy Overview', style=tab_style, selected_style=tab_selected_style, children=[
+                html.Div(style={'padding': '20px'}, children=[
+
+                    # Filter: Global  Year Selection
+                    html.Div(style=card_container_style, children=[
                         html.Div([
-                            html.Label("Select Country:", style={'fontWeight': 'bold', 'marginRight': '10px', 'color': THEME['text']}),
+                            # html.Span("📅", style={'fontSize': '20px', 'marginRight': '10px'}),
+                            html.Label("Select Reporting Year:", style={'fontWeight': 'bold', 'marginRight': '15px'}),
                             dcc.Dropdown(
-                                id='customer-country-filter',
-                                options=country_options,
-                                value='All Countries',
+                                id='year-filter',
+                                options=year_options,
+                                value=year_options[0] if year_options else None, # Default to first year
                                 clearable=False,
-                                style={'width': '250px'}
+                                style={'width': '200px'}
                             )
-                        ], style={'width': '40%', 'display': 'flex', 'justifyContent': 'flex-end', 'alignItems': 'center'})
-                    ], style={'display': 'flex', 'justifyContent': 'space-between', 'alignItems': 'start', 'marginBottom': '20px'}),
-                    # Graph: Customer Matrix wrapped in centering div
-                    html.Div(style=graph_wrapper_style, children=[
-                        dcc.Graph(
-                            id='customer-matrix-graph',
-                            style = {'height': '80vh'}
-                        ),
+                        ], style={'display': 'flex', 'alignItems': 'center'})
                     ]),
-                ]),
-            ])
-        ]),
+                
+                    # Card: Revenue Map
+                    html.Div(style=card_container_style, children=[
+                        html.Div([
+                            html.Div([
+                                html.H2("Global Revenue Visualization", style={'fontSize': '22px', 'color': THEME['text'], 'marginBottom': '10px'}),
+                                html.P("Overview of total revenue and efficiency across different regions.", style={'color': THEME['text_light'], 'fontSize': '14px'})
+                            ], style={'width': '60%'}),
+                        ], style={'display': 'flex', 'justifyContent': 'space-between', 'alignItems': 'start', 'marginBottom': '20px'}),
+                    
+                        # Graph: Map wrapped in centering div
+                        html.Div(style=graph_wrapper_style, children=[
+                            dcc.Graph(
+                                id='global-revenue-graph',
+                                style={'height': '80vh'} 
+                            ),
+                            # True once a full chart has been sent; later updates are Patches
+                            dcc.Store(id='global-revenue-graph-sent')
+                        ])
+                    ]),
+                    # Card: Customer Value Matrix
+                    html.Div(style=card_container_style, children=[
+                        html.Div([
+                            html.Div([
+                                html.H2("Customer Value Matrix", style={'fontSize': '22px', 'color': THEME['text'], 'marginBottom': '10px'})
+                            ], style={'width': '60%'}),
+                            html.Div([
+                                html.Label("Select Country:", style={'fontWeight': 'bold', 'marginRight': '10px', 'color': THEME['text']}),
+                                dcc.Dropdown(
+                                    id='customer-country-filter',
+                                    options=country_options,
+                                    value='All Countries',
+                                    clearable=False,
+                                    style={'width': '250px'}
+                                )
+                            ], style={'width': '40%', 'display': 'flex', 'justifyContent': 'flex-end', 'alignItems': 'center'})
+                        ], style={'display': 'flex', 'justifyContent': 'space-between', 'alignItems': 'start', 'marginBottom': '20px'}),
+                        # Graph: Customer Matrix wrapped in centering div
+                        html.Div(style=graph_wrapper_style, children=[
+                            dcc.Graph(
+                                id='customer-matrix-graph',
+                                style = {'height': '80vh'}
+                            ),
+                            # True once a full chart has been sent; later updates are Patches
+                            dcc.Store(id='customer-matrix-graph-sent'),
+                        ]),
+                    ]),
+                ])
+            ]),
 
-        # === TAB 2: OPERATIONS ===
-        dcc.Tab(label='Operational Information', style=tab_style, selected_style=tab_selected_style, children=[
-            html.Div(style={'padding': '20px'}, children=[
+            # === TAB 2: OPERATIONS ===
+            dcc.Tab(label='Operational Information', style=tab_style, selected_style=tab_selected_style, children=[
+                html.Div(style={'padding': '20px'}, children=[
                 
-                # Filter Section
-                html.Div(style=card_container_style, children=[
-                    html.Label("Filter by Country:", style={'fontWeight': 'bold', 'marginBottom': '10px', 'display': 'block', 'color': THEME['text']}),
-                    dcc.Dropdown(
-                        id='country-filter',
-                        options=country_options,
-                        value=None,
-                        placeholder="Select a Country to analyze specific performance...",
-                        clearable=True,
-                        style={'width': '100%', 'maxWidth': '400px'}
-                    )
-                ]),
-
-                # Card: Product Performance
-                html.Div(style=card_container_style, children=[
-                    html.H2("Product Performance Analysis", style={'fontSize': '22px', 'color': THEME['text'], 'marginBottom': '20px'}),
-                    # Graph wrapper
-                    html.Div(style=graph_wrapper_style, children=[
-                        dcc.Graph(
-                            id='product-performance-graph',
-                            style={'height': '500px'} 
-                        )
-                    ])
-                ]),
-
-                # Card: Service Quality
-                html.Div(style=card_container_style, children=[
-                    html.H2("Service Quality Over Time", style={'fontSize': '22px', 'color': THEME['text'], 'marginBottom': '20px'}),
-                    # Graph wrapper
-                    html.Div(style=graph_wrapper_style, children=[
-                        dcc.Graph(
-                            id='service-quality-graph',
-                            style={'height': '500px'}
+                    # Filter Section
+                    html.Div(style=card_container_style, children=[
+                        html.Label("Filter by Country:", style={'fontWeight': 'bold', 'marginBottom': '10px', 'display': 'block', 'color': THEME['text']}),
+                        dcc.Dropdown(
+                            id='country-filter',
+                            options=country_options,
+                            value=None,
+                            placeholder="Select a Country to analyze specific performance...",
+                            clearable=True,
+                            style={'width': '100%', 'maxWidth': '400px'}
                         )
+                    ]),
+
+                    # Card: Product Performance
+                    html.Div(style=card_container_style, children=[
+                        html.Div([
+                            html.H2("Product Performance Analysis", style={'fontSize': '22px', 'color': THEME['text']}),
+                            # Drill down from categories to individual products
+                            dcc.RadioItems(
+                                id='product-level',
+                                options=[
+                                    {'label': 'By Category', 'value': 'category'},
+                                    {'label': 'By Product', 'value': 'product'},
+                                ],
+                                value='category',
+                                inline=True,
+                                inputStyle={'marginRight': '6px', 'marginLeft': '12px'},
+                                style={'color': THEME['text']}
+                            )
+                        ], style={'display': 'flex', 'justifyContent': 'space-between', 'alignItems': 'center', 'marginBottom': '20px'}),
+                        # Graph wrapper
+                        html.Div(style=graph_wrapper_style, children=[
+                            dcc.Graph(
+                                id='product-performance-graph',
+                                style={'height': '500px'} 
+                            ),
+                            # True once a full chart has been sent; later updates are Patches
+                            dcc.Store(id='product-performance-graph-sent')
+                        ])
+                    ]),
+
+                    # Card: Service Quality
+                    html.Div(style=card_container_style, children=[
+                        html.H2("Service Quality Over Time", style={'fontSize': '22px', 'color': THEME['text'], 'marginBottom': '20px'}),
+                        # Graph wrapper
+                        html.Div(style=graph_wrapper_style, children=[
+                            dcc.Graph(
+                                id='service-quality-graph',
+                                style={'height': '500px'}
+                            ),
+                            # True once a full chart has been sent; later updates are Patches
+                            dcc.Store(id='service-quality-graph-sent')
+                        ])
                     ])
                 ])
             ])
         ])
     ])
-])
+
+# Served on every page load: each browser tab gets its own session id, so its
+# newer requests can supersede its older ones still waiting for a build (see builds.py)
+def serve_layout():
+    return html.Div([dcc.Store(id='session-id', data=uuid.uuid4().hex),
+                     dashboard(get_year_list(), get_country_list())])
+
+# Dash checks the callbacks against a layout as soon as one is assigned: give it
+# the same page without options, so importing this module reads no data
+app.validation_layout = html.Div([dcc.Store(id='session-id'), dashboard([], [])])
+app.layout = serve_layout
 
 # --- CALLBACKS ---
 
+# Send the full figure on first load (or when switching to/from an empty figure),
+# otherwise only a Patch with the changed data arrays and title
+def send_figure(fig, chart, chart_sent):
+    has_chart = bool(fig['data'])
+    if chart_sent and has_chart:
+        return figure_patch(fig, chart), True
+    return fig, has_chart
+
 @callback(
     [
         Output('product-performance-graph', 'figure'),
         Output('service-quality-graph', 'figure'),
+        Output('product-performance-graph-sent', 'data'),
+        Output('service-quality-graph-sent', 'data'),
     ],
-    Input('country-filter', 'value')
+    Input('country-filter', 'value'),
+    Input('product-level', 'value'),
+    State('product-performance-graph-sent', 'data'),
+    State('service-quality-graph-sent', 'data'),
+    State('session-id', 'data'),
 )
-def update_product_performance(selected_country):
-    fig_product, fig_service = get_product_performance(selected_country), get_service_quality(selected_country)
-    
-    # Style Product Graph
-    # fig_product.update_traces(marker_color=THEME['primary'], selector=dict(type='bar'))
-    fig_product.update_traces(line_color='#000080', selector=dict(type='scatter')) 
-    
-    fig_product.update_layout(
-        paper_bgcolor='white',
-        plot_bgcolor='white',
-        font={'family': 'Segoe UI, sans-serif', 'color': THEME['text']},
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-
-    # Style Service Graph
-    fig_service.update_traces(line_color='#FFAB00', selector=dict(name='Avg Shipping Days')) 
-    fig_service.update_traces(line_color=THEME['primary'], selector=dict(name='Avg Review Score'))
-    
-    fig_service.update_layout(
-        paper_bgcolor='white',
-        plot_bgcolor='white',
-        font={'family': 'Segoe UI, sans-serif', 'color': THEME['text']},
-        margin=dict(l=40, r=40, t=40, b=40),
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
+@timed_callback
+def update_product_performance(selected_country, level='category', product_sent=None, service_sent=None,
+                               session_id=None):
+    # Figures come back fully styled from render.py, ready to send
+    # The product level does not change the service quality chart: keep it, and any zoom
+    level_only = ctx.triggered_id == 'product-level'
+    with build_pool.request(session_id, 'operations'):
+        fig_product = get_product_performance(selected_country, level or 'category')
+        fig_service = None if level_only else get_service_quality(selected_country)
 
-    return fig_product, fig_service
+    fig_product, product_sent = send_figure(fig_product, 'product_performance', product_sent)
+    if level_only:
+        return fig_product, no_update, product_sent, service_sent
+    fig_service, service_sent = send_figure(fig_service, 'service_quality', service_sent)
+    if isinstance(fig_service, Patch):
+        # The new country comes at the full-range buckets: zoom out, or a zoomed
+        # chart would show them where it showed the finer ones
+        fig_service['layout']['xaxis']['autorange'] = True
+    return fig_product, fig_service, product_sent, service_sent
+
+# (start, end) of the x axis range in a graph's relayoutData, (None, None) when
+# the axis went back to autorange, None when the x axis did not change
+def zoom_range(relayout):
+    if not relayout:
+        return None
+    if relayout.get('xaxis.autorange'):
+        return None, None
+    if 'xaxis.range' in relayout:
+        return tuple(relayout['xaxis.range'][:2])
+    if 'xaxis.range[0]' in relayout and 'xaxis.range[1]' in relayout:
+        return relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    return None
+
+# Zooming the service quality chart (rangeslider or drag) re-reads the zoomed
+# dates at a finer time bucket; autoscale goes back to the full-range buckets.
+# Only the data and the axis title are patched, so the zoom itself stays.
+@callback(
+    Output('service-quality-graph', 'figure', allow_duplicate=True),
+    Input('service-quality-graph', 'relayoutData'),
+    State('country-filter', 'value'),
+    State('session-id', 'data'),
+    prevent_initial_call=True,
+)
+@timed_callback
+def zoom_service_quality(relayout, selected_country, session_id=None):
+    window = zoom_range(relayout)
+    if window is None:
+        raise PreventUpdate
+    with build_pool.request(session_id, 'service_quality_zoom'):
+        fig_service = get_service_quality_zoomed(selected_country, *window)
+    if not fig_service['data']:
+        raise PreventUpdate
+    return figure_patch(fig_service, 'service_quality')
 
 @callback(
     Output('global-revenue-graph', 'figure'),
-    Input('year-filter', 'value')
+    Output('global-revenue-graph-sent', 'data'),
+    Input('year-filter', 'value'),
+    State('global-revenue-graph-sent', 'data'),
+    State('session-id', 'data'),
 )
-def update_global_revenue(selected_year):
+@timed_callback
+def update_global_revenue(selected_year, chart_sent=None, session_id=None):
     if not selected_year:
+        year_options = get_year_list()
         if year_options:
             selected_year = year_options[0]
         else:
-            return go.Figure()
-    fig_map = get_global_revenue(selected_year)
-    
-    
-    fig_map.update_layout(
-        paper_bgcolor='white',
-        plot_bgcolor='white',
-        font={'family': 'Segoe UI, sans-serif', 'color': THEME['text']},
-        margin=dict(l=0, r=0, t=30, b=0),
-        geo=dict(
-            bgcolor='white',            
-            showland=True,              
-            landcolor="#EAE7E7",       
-            countrycolor='white',       
-            showcoastlines=False,       
-            showframe=False,            
-            projection_type='natural earth'
-        )
-    )
-    
-    return fig_map
+            return render_empty(""), False
+    with build_pool.request(session_id, 'global_revenue'):
+        fig_map = get_global_revenue(selected_year)
+    return send_figure(fig_map, 'global_revenue', chart_sent)
 
 @callback(
     Output('customer-matrix-graph', 'figure'),
+    Output('customer-matrix-graph-sent', 'data'),
     Input('year-filter', 'value'),
-    Input('customer-country-filter', 'value')
+    Input('customer-country-filter', 'value'),
+    State('customer-matrix-graph-sent', 'data'),
+    State('session-id', 'data'),
 )
-def update_customer_matrix(selected_year,selected_country):
+@timed_callback
+def update_customer_matrix(selected_year, selected_country, chart_sent=None, session_id=None):
     if not selected_year:
+        year_options = get_year_list()
         selected_year = year_options[0] if year_options else None
     
     if not selected_country:
         selected_country = "All Countries"
 
-    fig_customer_matrix = get_customer_matrix_plot(selected_year, selected_country)
+    with build_pool.request(session_id, 'customer_matrix'):
+        fig_customer_matrix = get_customer_matrix_plot(selected_year, selected_country)
         
-    return fig_customer_matrix
+    return send_figure(fig_customer_matrix, 'customer_matrix', chart_sent)
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the 3PY e-commerce dashboard.")
+    parser.add_argument('--warm', action='store_true', help="pre-compute every filter combination at startup")
+    parser.add_argument('--warm-workers', type=int, default=4, help="threads used for the warm-up (default: 4)")
+    args = parser.parse_args()
+
+    if args.warm:
+        warmup.start(workers=args.warm_workers)
+
+    app.run(debug=True)
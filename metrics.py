@@ -0,0 +1,145 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# --- METRICS SETTINGS ---
+# Callbacks slower than SLOW_CALLBACK_MS are appended to SLOW_CALLBACK_LOG (JSON
+# lines with the filter values); leave SLOW_CALLBACK_LOG unset to disable the log.
+SLOW_CALLBACK_MS = float(os.environ.get("SLOW_CALLBACK_MS", "1000"))
+SLOW_CALLBACK_LOG = os.environ.get("SLOW_CALLBACK_LOG") or None
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROWS_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+# Cumulative histogram per label set, in the Prometheus text format.
+# Values live in this process only: every gunicorn worker reports its own.
+class Histogram:
+    def __init__(self, name, help_text, label, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}   # label value -> [bucket counts..., sum, count]
+
+    def observe(self, label_value, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {value: list(counts) for value, counts in self._series.items()}
+        for value, counts in sorted(series.items()):
+            label = f'{self.label}="{value}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                # repr keeps every digit: le="1048576.0", not le="1.04858e+06"
+                lines.append(f'{self.name}_bucket{{{label},le="{float(bound)!r}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {counts[-1]}')
+            lines.append(f'{self.name}_sum{{{label}}} {counts[-2]:.6f}')
+            lines.append(f'{self.name}_count{{{label}}} {counts[-1]}')
+        return lines
+
+
+query_seconds = Histogram("dashboard_query_seconds", "Time spent fetching the data of one query.",
+                          "query", SECONDS_BUCKETS)
+query_rows = Histogram("dashboard_query_rows", "Rows returned by one query.", "query", ROWS_BUCKETS)
+figure_seconds = Histogram("dashboard_figure_build_seconds", "Time spent building one figure (cache misses).",
+                           "figure", SECONDS_BUCKETS)
+callback_seconds = Histogram("dashboard_callback_seconds", "Time spent in one Dash callback.",
+                             "callback", SECONDS_BUCKETS)
+payload_bytes = Histogram("dashboard_callback_payload_bytes", "Size of one callback response body.",
+                          "callback", BYTES_BUCKETS)
+HISTOGRAMS = [query_seconds, query_rows, figure_seconds, callback_seconds, payload_bytes]
+
+# Callback currently running in each request thread, for the payload size
+_current = threading.local()
+_log_lock = threading.Lock()
+
+
+# `with observe_query("file.sql") as rows: df = ...; rows(len(df))`
+@contextmanager
+def observe_query(name):
+    counted = []
+    started = time.perf_counter()
+    yield counted.append
+    query_seconds.observe(name, time.perf_counter() - started)
+    if counted:
+        query_rows.observe(name, counted[0])
+
+
+# Decorator: time a visual.py figure builder
+def timed_figure(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            figure_seconds.observe(func.__name__, time.perf_counter() - started)
+    return wrapper
+
+
+# Decorator: time a Dash callback and log it with its inputs when slow
+def timed_callback(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _current.callback = func.__name__
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - started
+            callback_seconds.observe(func.__name__, seconds)
+            if SLOW_CALLBACK_LOG and seconds * 1000 >= SLOW_CALLBACK_MS:
+                _log_slow(func.__name__, seconds, args, kwargs)
+    return wrapper
+
+
+def _log_slow(name, seconds, args, kwargs):
+    entry = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'callback': name,
+             'ms': round(seconds * 1000, 1), 'args': list(args), 'kwargs': kwargs, 'pid': os.getpid()}
+    try:
+        with _log_lock, open(SLOW_CALLBACK_LOG, 'a') as file:
+            file.write(json.dumps(entry, default=str) + "\n")
+    except OSError as e:
+        print(f"Error: Could not write the slow callback log: {e}")
+
+
+# Flask after_request hook: record the body size of callback responses
+def record_payload(response):
+    name = getattr(_current, 'callback', None)
+    if name is not None:
+        _current.callback = None
+        size = response.calculate_content_length()
+        if size is not None:
+            payload_bytes.observe(name, size)
+    return response
+
+
+# Prometheus text exposition of every histogram, plus optional gauges {name: value}
+def render_metrics(gauges=None, counters=None):
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for name, value in (gauges or {}).items():
+        lines.extend([f"# TYPE {name} gauge", f"{name} {value}"])
+    # Counters only go up; their names end in _total
+    for name, value in (counters or {}).items():
+        lines.extend([f"# TYPE {name}_total counter", f"{name}_total {value}"])
+    return "\n".join(lines) + "\n"
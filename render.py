@@ -0,0 +1,410 @@
+import functools
+import json
+
+import pandas as pd
+from dash import Patch
+from plotly.io.json import to_json_plotly
+from plotly.subplots import make_subplots
+from _plotly_utils.utils import to_typed_array_spec
+
+from theme import THEME
+
+# --- FIGURE RENDERING LAYER ---
+# Each chart is built once with plotly on a one-row sample to get its static
+# skeleton (template, axes, THEME styling, hover templates). Requests only
+# splice their data arrays and title into a copy of that skeleton and return
+# a plain figure dict, which Dash sends without rebuilding plotly objects.
+# Rendered figures are shared with the figure cache: treat them as read-only.
+
+# Styling shared by every chart card (previously applied in main.py callbacks)
+CARD_LAYOUT = dict(
+    paper_bgcolor='white',
+    plot_bgcolor='white',
+    font={'family': 'Segoe UI, sans-serif', 'color': THEME['text']},
+)
+
+# px.scatter_geo default maximum marker size (used to compute marker.sizeref)
+GEO_SIZE_MAX = 20
+
+
+# --- FULL PLOTLY BUILDERS ---
+# Used for the skeletons, and by benchmarks/bench_render.py as the old per-request path.
+# plotly.express and plotly.graph_objects are imported here rather than at the
+# top: they are only needed the first time a worker builds a skeleton, so a
+# worker starts without loading them.
+
+def build_global_revenue_figure(df_plot, title):
+    import plotly.express as px
+
+    fig = px.scatter_geo(
+        df_plot,
+        locations="country",
+        locationmode="country names",
+        color="total_revenue",
+        size="total_revenue",
+        hover_name="country",
+        projection="natural earth",
+        title=title,
+        template="plotly_white",
+        color_continuous_scale=px.colors.sequential.Blues,
+
+        # Add 'growth_label' to custom_data (Index 3)
+        custom_data=['total_revenue', 'avg_basket_size', 'avg_delivery_time', 'growth_label']
+    )
+
+    # Update Tooltip with HTML support
+    fig.update_traces(
+        hovertemplate="<b>%{hovertext}</b><br>" +
+                      "<i>Growth: %{customdata[3]}</i><br><br>" + # Shows colored arrow
+                      "Total Revenue: $%{customdata[0]:,.0f}<br>" +
+                      "Avg. Basket Size: $%{customdata[1]:,.0f}<br>" +
+                      "Avg. Delivery Time: %{customdata[2]:.1f} days<extra></extra>"
+    )
+
+    # Ensure Hover Background is White
+    fig.update_layout(
+        hoverlabel=dict(
+            bgcolor="white",
+            font_size=14,
+            font_family="Arial"
+        ),
+        coloraxis_colorbar=dict(title="Revenue ($)")
+    )
+
+    # Card styling
+    fig.update_layout(
+        **CARD_LAYOUT,
+        margin=dict(l=0, r=0, t=30, b=0),
+        geo=dict(
+            bgcolor='white',
+            showland=True,
+            landcolor="#EAE7E7",
+            countrycolor='white',
+            showcoastlines=False,
+            showframe=False,
+            projection_type='natural earth'
+        )
+    )
+    return fig
+
+
+def build_customer_matrix_figure(df, title):
+    import plotly.express as px
+
+    fig = px.line(
+        df,
+        x='full_date',
+        y='total_spent',
+        color='country',
+        markers=True,
+        title=title,
+        template="plotly_white",
+        custom_data=['country', 'full_date', 'total_spent']
+    )
+
+    # Tooltip Styling
+    fig.update_traces(
+        hovertemplate="<b>Country:</b> %{customdata[0]}<br>"
+                      "<b>Date:</b> %{x|%B %Y}<br>"
+                      "<b>Total Spent:</b> $%{y:,.2f}<extra></extra>"
+    )
+
+    # Layout
+    fig.update_layout(
+        xaxis_title='Month',
+        yaxis_title='Total Spent ($)',
+        xaxis=dict(type='date', dtick="M1", tickformat="%b %Y"),
+        hoverlabel=dict(bgcolor='white'),
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+    return fig
+
+
+def build_product_performance_figure(df, colors, annotations, avg_sales_volume, title,
+                                     x_column='category', x_title="Product Category",
+                                     threshold_text="Avg Sales Volume"):
+    import plotly.graph_objects as go
+
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    # Bar Chart -- Total Sales Volume
+    fig.add_trace(
+        go.Bar(
+            x = df[x_column],
+            y = df['total_sales_volume'],
+            name = 'Total Sales Volume',
+            marker_color=colors,
+            text=annotations,
+            textposition='inside',
+            insidetextanchor='start',
+            yaxis = 'y1'
+        ),
+        secondary_y = False,
+    )
+
+    # Line Chart -- Average Customer Rating
+    fig.add_trace(
+        go.Scatter(
+            x = df[x_column],
+            y = df['average_customer_rating'],
+            name = 'Average Customer Rating',
+            marker_color='blue',
+            line_color='#000080',
+            yaxis = 'y2'
+        ),
+        secondary_y = True,
+    )
+
+    fig.add_hline(
+        y = avg_sales_volume,
+        line_dash="dot",
+        annotation_text=threshold_text,
+        line_color="green"
+    )
+
+    # Layout Adjustments
+    fig.update_layout(
+        title_text = title,
+        **CARD_LAYOUT,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    fig.update_xaxes(title_text=x_title)
+    fig.update_yaxes(title_text="Total Sales Volume", secondary_y=False, autorange=True)
+    fig.update_yaxes(title_text="Average Customer Rating (1-5)", secondary_y=True, autorange=True)
+    return fig
+
+
+def build_service_quality_figure(df, title, x_title=None):
+    import plotly.graph_objects as go
+
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    # Line 1 -- Avg Shipping Days
+    fig.add_trace(
+        go.Scatter(
+            x = df['month'],
+            y = df['avg_shipping_days'],
+            name = 'Avg Shipping Days',
+            marker_color='orange',
+            line_color='#FFAB00',
+            mode='lines+markers',
+            yaxis='y1'
+        ),
+        secondary_y = False,
+    )
+
+    # Line 2 -- Avg Review Score
+    fig.add_trace(
+        go.Scatter(
+            x = df['month'],
+            y = df['avg_review_score'],
+            name = 'Avg Review Score',
+            marker_color='blue',
+            line_color=THEME['primary'],
+            mode='lines+markers',
+            yaxis='y2'
+        ),
+        secondary_y = True,
+    )
+
+    # Layout Adjustments
+    fig.update_layout(
+        title_text = title,
+        hovermode='x unified',
+        **CARD_LAYOUT,
+        margin=dict(l=40, r=40, t=40, b=40),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+    # X-axis
+    fig.update_xaxes(
+        title_text=x_title or "Time (Monthly)",
+        rangeslider=dict(visible=True),
+        type='date'
+    )
+
+    # Left Y-axis
+    fig.update_yaxes(
+        title_text="Avg Shipping Days",
+        secondary_y=False
+    )
+
+    # Right Y-axis
+    fig.update_yaxes(
+        title_text="Avg Review Score (1-5)",
+        secondary_y=True,
+        range=[0, 5.5]
+    )
+    return fig
+
+
+# --- SKELETONS ---
+
+def _to_dict(fig):
+    return json.loads(fig.to_json())
+
+
+@functools.lru_cache(maxsize=None)
+def _skeleton(chart):
+    if chart == 'empty':
+        import plotly.graph_objects as go
+        return _to_dict(go.Figure().update_layout(title="-"))
+
+    if chart == 'global_revenue':
+        sample = pd.DataFrame({'country': ['France'], 'total_revenue': [1.0], 'avg_basket_size': [1.0],
+                               'avg_delivery_time': [1.0], 'growth_label': ['-']})
+        return _to_dict(build_global_revenue_figure(sample, "-"))
+
+    if chart == 'customer_matrix':
+        sample = pd.DataFrame({'country': ['France'], 'full_date': [pd.Timestamp('2024-01-01')],
+                               'total_spent': [1.0]})
+        return _to_dict(build_customer_matrix_figure(sample, "-"))
+
+    if chart == 'product_performance':
+        sample = pd.DataFrame({'category': ['-'], 'total_sales_volume': [1], 'average_customer_rating': [1.0]})
+        return _to_dict(build_product_performance_figure(sample, ['#1976D2'], [''], 1.0, "-"))
+
+    if chart == 'service_quality':
+        sample = pd.DataFrame({'month': [pd.Timestamp('2024-01-01')], 'avg_shipping_days': [1.0],
+                               'avg_review_score': [1.0]})
+        return _to_dict(build_service_quality_figure(sample, "-"))
+
+    raise ValueError(f"Unknown chart: {chart}")
+
+
+# Numeric column as a base64 typed array, the compact encoding plotly itself sends
+def _numeric(column):
+    return to_typed_array_spec(column.to_numpy())
+
+
+# Shallow copy of the skeleton layout with a new title
+def _layout(skeleton, title):
+    layout = dict(skeleton['layout'])
+    layout['title'] = dict(layout.get('title', {}), text=title)
+    return layout
+
+
+# --- PER-REQUEST RENDERERS ---
+
+def render_empty(title):
+    return {'data': [], 'layout': _layout(_skeleton('empty'), title)}
+
+
+def render_global_revenue(df_plot, title):
+    skeleton = _skeleton('global_revenue')
+    revenue = df_plot['total_revenue']
+
+    trace = dict(skeleton['data'][0])
+    trace['locations'] = df_plot['country'].to_numpy()
+    trace['hovertext'] = df_plot['country'].to_numpy()
+    trace['customdata'] = df_plot[['total_revenue', 'avg_basket_size', 'avg_delivery_time', 'growth_label']].to_numpy()
+    trace['marker'] = dict(
+        trace['marker'],
+        color=_numeric(revenue),
+        size=_numeric(revenue),
+        # Same scaling px.scatter_geo applies for size_max=20
+        sizeref=float(revenue.max()) / GEO_SIZE_MAX ** 2,
+    )
+    return {'data': [trace], 'layout': _layout(skeleton, title)}
+
+
+def render_customer_matrix(df, title):
+    skeleton = _skeleton('customer_matrix')
+    template = skeleton['data'][0]
+    # Colors px.line assigns to successive countries (the plotly_white colorway)
+    colorway = skeleton['layout']['template']['layout']['colorway']
+
+    # One line per country, in order of first appearance (as px.line does)
+    traces = []
+    for i, (country, group) in enumerate(df.groupby('country', sort=False)):
+        trace = dict(template)
+        trace['name'] = country
+        trace['legendgroup'] = country
+        trace['line'] = dict(template['line'], color=colorway[i % len(colorway)])
+        trace['x'] = group['full_date'].to_numpy()
+        trace['y'] = _numeric(group['total_spent'])
+        trace['customdata'] = group[['country', 'full_date', 'total_spent']].to_numpy()
+        traces.append(trace)
+    return {'data': traces, 'layout': _layout(skeleton, title)}
+
+
+def render_product_performance(df, colors, annotations, avg_sales_volume, title,
+                               x_column='category', x_title="Product Category",
+                               threshold_text="Avg Sales Volume"):
+    skeleton = _skeleton('product_performance')
+    bar, line = (dict(trace) for trace in skeleton['data'])
+
+    labels = df[x_column].to_numpy()
+    bar['x'] = labels
+    bar['y'] = _numeric(df['total_sales_volume'])
+    bar['marker'] = dict(bar['marker'], color=colors)
+    bar['text'] = annotations
+
+    line['x'] = labels
+    line['y'] = _numeric(df['average_customer_rating'])
+
+    # Move the threshold line and its label to the new threshold
+    layout = _layout(skeleton, title)
+    avg_sales_volume = float(avg_sales_volume)
+    layout['shapes'] = [dict(shape, y0=avg_sales_volume, y1=avg_sales_volume) for shape in layout['shapes']]
+    layout['annotations'] = [dict(note, y=avg_sales_volume, text=threshold_text) for note in layout['annotations']]
+    layout['xaxis'] = dict(layout['xaxis'], title=dict(layout['xaxis']['title'], text=x_title))
+    return {'data': [bar, line], 'layout': layout}
+
+
+# x_title names the time bucket, e.g. "Time (Weekly)"
+def render_service_quality(df, title, x_title=None):
+    skeleton = _skeleton('service_quality')
+    shipping, review = (dict(trace) for trace in skeleton['data'])
+
+    months = df['month'].to_numpy()
+    shipping['x'] = months
+    shipping['y'] = _numeric(df['avg_shipping_days'])
+    review['x'] = months
+    review['y'] = _numeric(df['avg_review_score'])
+    layout = _layout(skeleton, title)
+    if x_title:
+        layout['xaxis'] = dict(layout['xaxis'], title=dict(layout['xaxis'].get('title', {}), text=x_title))
+    return {'data': [shipping, review], 'layout': layout}
+
+
+# --- PARTIAL UPDATES ---
+# Fields each renderer fills in per request: (trace fields, layout fields).
+# None replaces the whole trace list (the customer matrix has one trace per country).
+# A dotted layout field ("xaxis.title") replaces only that part, so the patch
+# keeps the rest of the axis, e.g. the range the user zoomed to.
+PATCH_FIELDS = {
+    'global_revenue': (('locations', 'hovertext', 'customdata', 'marker'), ()),
+    'customer_matrix': (None, ()),
+    'product_performance': (('x', 'y', 'marker', 'text'), ('shapes', 'annotations', 'xaxis')),
+    'service_quality': (('x', 'y'), ('xaxis.title',)),
+}
+
+
+# Dash Patch that turns a figure already showing `chart` into `fig`,
+# sending only the spliced data arrays and the title
+def figure_patch(fig, chart):
+    trace_fields, layout_fields = PATCH_FIELDS[chart]
+    patch = Patch()
+    if trace_fields is None:
+        patch['data'] = fig['data']
+    else:
+        for i, trace in enumerate(fig['data']):
+            for field in trace_fields:
+                if field in trace:
+                    patch['data'][i][field] = trace[field]
+
+    patch['layout']['title']['text'] = fig['layout']['title']['text']
+    for field in layout_fields:
+        target, source = patch['layout'], fig['layout']
+        *parents, name = field.split('.')
+        for parent in parents:
+            target, source = target[parent], source[parent]
+        target[name] = source[name]
+    return patch
+
+
+# Serialize a rendered figure exactly as Dash does for a callback response
+def figure_to_json(fig):
+    return to_json_plotly(fig)
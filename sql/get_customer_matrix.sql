@@ -1,15 +1,14 @@
 SELECT 
-    c.country,
-    STRFTIME('%Y-%m-01', o.order_date) as full_date,
-    SUM(oi.quantity * oi.unit_price) as total_spent
-FROM Orders o 
-JOIN Customers c ON o.customer_id = c.customer_id 
-JOIN Order_Items oi ON o.order_id = oi.order_id 
-WHERE 
-    o.order_status IN ('Pending', 'Delivered', 'Shipped')
-    AND (? IS NULL OR STRFTIME('%Y', o.order_date) = ?)
-    AND (? IS NULL OR c.country = ?)
+    country,
+    PRINTF('%04d-%02d-01', year, month) as full_date,
+    SUM(active_revenue) as total_spent
+FROM Monthly_Sales
+WHERE TRUE
+    AND year = :year            -- if year
+    AND country = :country      -- if country
 GROUP BY 
-    c.country, full_date
+    year, month, country
+HAVING 
+    SUM(active_revenue) > 0
 ORDER BY 
-    full_date;
\ No newline at end of file
+    year, month, country;
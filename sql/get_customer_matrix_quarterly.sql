@@ -0,0 +1,16 @@
+-- get_customer_matrix.sql by calendar quarter, for ranges too long to chart by
+-- month (see timeseries.choose_bucket)
+SELECT 
+    country,
+    PRINTF('%04d-%02d-01', year, (month - 1) / 3 * 3 + 1) as full_date,
+    SUM(active_revenue) as total_spent
+FROM Monthly_Sales
+WHERE TRUE
+    AND year = :year            -- if year
+    AND country = :country      -- if country
+GROUP BY 
+    year, (month - 1) / 3, country
+HAVING 
+    SUM(active_revenue) > 0
+ORDER BY 
+    year, (month - 1) / 3, country;
@@ -1,11 +1,39 @@
+-- :year = reporting year (NULL = latest year); only that year and the one before are read
+WITH target AS (
+    SELECT COALESCE(:year, (SELECT MAX(year) FROM Monthly_Sales)) AS year
+),
+yearly AS (
+    SELECT s.year, s.country, s.total_revenue,
+        ROUND(o.shipping_days_sum / o.shipped_count, 1) AS avg_delivery_time,
+        ROUND(s.total_revenue / o.order_count, 0) AS avg_basket_size
+    FROM (
+        SELECT year, country, SUM(revenue) AS total_revenue
+        FROM Monthly_Sales
+        WHERE year BETWEEN (SELECT year FROM target) - 1 AND (SELECT year FROM target)
+        GROUP BY year, country
+    ) AS s
+    JOIN (
+        SELECT year, country,
+            SUM(order_count) AS order_count,
+            SUM(shipped_count) AS shipped_count,
+            SUM(shipping_days_sum) AS shipping_days_sum
+        FROM Monthly_Orders
+        WHERE year BETWEEN (SELECT year FROM target) - 1 AND (SELECT year FROM target)
+        GROUP BY year, country
+    ) AS o ON s.year = o.year AND s.country = o.country
+),
+growth AS (
+    SELECT *,
+        LAG(total_revenue) OVER (PARTITION BY country ORDER BY year) AS prev_revenue
+    FROM yearly
+)
 SELECT
-    strftime('%Y', o.order_date) AS year,
-    c.country,
-    SUM(oi.quantity * oi.unit_price) AS total_revenue,
-    ROUND(AVG(JULIANDAY(o.delivery_date) - JULIANDAY(o.order_date)), 1) AS avg_delivery_time,
-    ROUND(SUM(oi.quantity * oi.unit_price) / COUNT(DISTINCT o.order_id), 0) AS avg_basket_size
-FROM Orders AS o
-JOIN Customers AS c ON o.customer_id = c.customer_id
-JOIN Order_Items AS oi ON o.order_id = oi.order_id
-GROUP BY 
-    year, c.country;
\ No newline at end of file
+    CAST(year AS TEXT) AS year,
+    country,
+    total_revenue,
+    avg_delivery_time,
+    avg_basket_size,
+    prev_revenue
+FROM growth
+WHERE year = (SELECT year FROM target)
+ORDER BY country;
@@ -0,0 +1,11 @@
+SELECT
+    product_id,
+    category,
+    SUM(sales_volume) AS total_sales_volume,
+    SUM(rating_sum) / SUM(rating_count) AS average_customer_rating
+FROM Product_Sales
+WHERE TRUE
+    AND country = :country      -- if country
+GROUP BY product_id, category
+HAVING SUM(rating_count) > 0
+ORDER BY total_sales_volume DESC, product_id;
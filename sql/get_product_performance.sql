@@ -1,12 +1,10 @@
 SELECT
-    p.category,
-    SUM(oi.quantity) AS total_sales_volume,
-    AVG(r.rating) AS average_customer_rating
-FROM Products as p
-JOIN Order_Items as oi ON p.product_id = oi.product_id
-JOIN Orders as o ON oi.order_id = o.order_id
-JOIN Customers as c ON o.customer_id = c.customer_id
-JOIN Reviews as r ON oi.order_id = r.order_id
-WHERE (? IS NULL OR c.country = ?)
-GROUP BY p.category
-ORDER BY total_sales_volume DESC;
\ No newline at end of file
+    category,
+    SUM(sales_volume) AS total_sales_volume,
+    SUM(rating_sum) / SUM(rating_count) AS average_customer_rating
+FROM Monthly_Sales
+WHERE TRUE
+    AND country = :country      -- if country
+GROUP BY category
+HAVING SUM(rating_count) > 0
+ORDER BY total_sales_volume DESC, category;
@@ -1,19 +1,13 @@
 SELECT
-    STRFTIME('%Y-%m-01', o.order_date) AS month,
-    AVG(julianday(o.delivery_date) - julianday(o.order_date)) AS avg_shipping_days,
-    AVG(r.rating) AS avg_review_score
+    PRINTF('%04d-%02d-01', m.year, m.month) AS month,
+    SUM(m.shipping_days_sum) / SUM(m.shipped_count) AS avg_shipping_days,
+    SUM(m.rating_sum) / SUM(m.rating_count) AS avg_review_score
 FROM
-    Orders o
-JOIN 
-    Customers c ON o.customer_id = c.customer_id
-LEFT JOIN
-    Reviews r
-ON
-    o.order_id = r.order_id
+    Monthly_Orders m
 WHERE
-    o.delivery_date IS NOT NULL
-    AND (? IS NULL OR c.country = ?)
+    m.shipped_count > 0
+    AND m.country = :country    -- if country
 GROUP BY
-    STRFTIME('%Y-%m-01', o.order_date)
+    m.year, m.month
 ORDER BY
-    month;
\ No newline at end of file
+    m.year, m.month;
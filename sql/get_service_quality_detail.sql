@@ -0,0 +1,22 @@
+-- Service quality per day or per week (:bucket = 'day' or 'week', weeks start on
+-- Monday) for the days in [start, end), when the service quality chart is zoomed
+-- in. Dates are passed as (:start_year, :start_month, :start_day) and
+-- (:end_year, :end_month, :end_day) so the window is an index range.
+SELECT
+    CASE :bucket
+        WHEN 'week' THEN DATE(PRINTF('%04d-%02d-%02d', d.year, d.month, d.day), '-6 days', 'weekday 1')
+        ELSE PRINTF('%04d-%02d-%02d', d.year, d.month, d.day)
+    END AS month,
+    SUM(d.shipping_days_sum) / SUM(d.shipped_count) AS avg_shipping_days,
+    SUM(d.rating_sum) / SUM(d.rating_count) AS avg_review_score
+FROM
+    Daily_Orders d
+WHERE
+    d.shipped_count > 0
+    AND (d.year, d.month, d.day) >= (:start_year, :start_month, :start_day)
+    AND (d.year, d.month, d.day) < (:end_year, :end_month, :end_day)
+    AND d.country = :country    -- if country
+GROUP BY
+    1
+ORDER BY
+    1;
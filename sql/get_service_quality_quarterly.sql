@@ -0,0 +1,15 @@
+-- get_service_quality.sql by calendar quarter, for ranges too long to chart by
+-- month (see timeseries.choose_bucket)
+SELECT
+    PRINTF('%04d-%02d-01', m.year, (m.month - 1) / 3 * 3 + 1) AS month,
+    SUM(m.shipping_days_sum) / SUM(m.shipped_count) AS avg_shipping_days,
+    SUM(m.rating_sum) / SUM(m.rating_count) AS avg_review_score
+FROM
+    Monthly_Orders m
+WHERE
+    m.shipped_count > 0
+    AND m.country = :country    -- if country
+GROUP BY
+    m.year, (m.month - 1) / 3
+ORDER BY
+    m.year, (m.month - 1) / 3;
@@ -0,0 +1,23 @@
+WITH order_reviews AS (
+    SELECT order_id, TOTAL(rating) AS rating_sum, COUNT(rating) AS rating_count
+    FROM Reviews
+    GROUP BY order_id
+)
+SELECT
+    c.country,
+    p.category,
+    p.product_id,
+    oi.order_id,
+    o.order_year,
+    o.order_month,
+    o.order_status IN ('Pending', 'Delivered', 'Shipped') AS active,
+    oi.quantity,
+    oi.quantity * oi.unit_price AS revenue,
+    JULIANDAY(o.delivery_date) - JULIANDAY(o.order_date) AS shipping_days,
+    COALESCE(r.rating_sum, 0) AS rating_sum,
+    COALESCE(r.rating_count, 0) AS rating_count
+FROM Order_Items oi
+JOIN Orders o ON oi.order_id = o.order_id
+JOIN Customers c ON o.customer_id = c.customer_id
+JOIN Products p ON oi.product_id = p.product_id
+LEFT JOIN order_reviews r ON oi.order_id = r.order_id;
@@ -0,0 +1,191 @@
+import threading
+import time
+
+import pytest
+from dash.exceptions import PreventUpdate
+
+from builds import BuildPool
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def start(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+# A build that blocks until released, for holding it in flight
+class Blocking:
+    def __init__(self, result='figure'):
+        self.result = result
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return self.result
+
+
+@pytest.mark.parametrize('enabled', [False, True])
+def test_build_errors_reach_the_caller(enabled):
+    pool = BuildPool(workers=2, enabled=enabled)
+
+    def fail():
+        raise ValueError("no data")
+
+    with pytest.raises(ValueError, match="no data"):
+        pool.run(('get_service_quality', 'France'), fail)
+    assert pool.info()['in_flight'] == 0
+    # The failed build is not remembered: the next request builds again
+    assert pool.run(('get_service_quality', 'France'), lambda: 'figure') == 'figure'
+
+
+def test_background_builds_run_in_the_pool():
+    pool = BuildPool(workers=2, enabled=True)
+    assert pool.run(('get_global_revenue', '2024'), threading.current_thread).name.startswith('build')
+
+
+def test_newer_request_supersedes_and_cancels_the_older_one():
+    pool = BuildPool(workers=1, enabled=True)
+    # Occupy the only worker, so the next build stays queued
+    blocker = Blocking()
+    blocked = start(pool.run, ('get_global_revenue', '2023'), blocker)
+    assert blocker.started.wait(5)
+
+    outcome = {}
+    stale_build = []
+
+    def older():
+        try:
+            with pool.request('session', 'revenue'):
+                outcome['older'] = pool.run(('get_global_revenue', '2024'), lambda: stale_build.append(1))
+        except PreventUpdate:
+            outcome['older'] = PreventUpdate
+
+    def newer():
+        with pool.request('session', 'revenue'):
+            outcome['newer'] = pool.run(('get_global_revenue', '2025'), lambda: 'figure 2025')
+
+    first = start(older)
+    wait_until(lambda: pool.info()['in_flight'] == 2)
+    second = start(newer)
+
+    # The older request answers PreventUpdate at once, and its queued build is cancelled
+    first.join(5)
+    assert outcome['older'] is PreventUpdate
+    assert pool.stats['superseded'] == 1 and pool.stats['cancelled'] == 1
+
+    blocker.release.set()
+    second.join(5)
+    blocked.join(5)
+    assert outcome['newer'] == 'figure 2025'
+    assert stale_build == []
+
+
+def test_superseded_build_still_serves_other_waiters():
+    pool = BuildPool(workers=1, enabled=True)
+    build = Blocking('figure 2024')
+    outcome = {}
+
+    def request(session, slot):
+        try:
+            with pool.request(session, slot):
+                outcome[session, slot] = pool.run(('get_global_revenue', '2024'), build)
+        except PreventUpdate:
+            outcome[session, slot] = PreventUpdate
+
+    first = start(request, 'tab 1', 'revenue')
+    assert build.started.wait(5)
+    other = start(request, 'tab 2', 'revenue')
+    wait_until(lambda: pool.stats['coalesced'] == 1)
+    # Tab 1 moves on; tab 2 still waits for the same build, so it is not cancelled
+    newer = start(request, 'tab 1', 'revenue')
+    first.join(5)
+    assert outcome['tab 1', 'revenue'] is PreventUpdate
+    assert pool.stats['cancelled'] == 0
+
+    build.release.set()
+    other.join(5)
+    newer.join(5)
+    assert outcome['tab 2', 'revenue'] == 'figure 2024'
+    assert build.calls == 1
+
+
+# --- SINGLE-FLIGHT ---
+
+@pytest.mark.parametrize('enabled', [False, True])
+def test_identical_builds_in_flight_run_once(enabled):
+    pool = BuildPool(workers=2, enabled=enabled)
+    build = Blocking('figure 2024')
+    results = []
+
+    def request():
+        results.append(pool.run(('get_global_revenue', '2024'), build))
+
+    leader = start(request)
+    assert build.started.wait(5)
+    followers = [start(request) for _ in range(3)]
+    wait_until(lambda: pool.stats['coalesced'] == 3)
+    build.release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert results == ['figure 2024'] * 4
+    assert build.calls == 1
+    info = pool.info()
+    assert info['computed'] == 1 and info['in_flight'] == 0
+    assert info['coalesced_by_builder'] == {'get_global_revenue': 3}
+
+
+def test_waiters_share_the_build_error():
+    pool = BuildPool(enabled=False)
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        assert release.wait(5)
+        raise ValueError("no data")
+
+    def request():
+        try:
+            pool.run(('get_customer_matrix_plot', '2024', 'France'), fail)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = start(request)
+    assert started.wait(5)
+    follower = start(request)
+    wait_until(lambda: pool.stats['coalesced'] == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert errors == ["no data", "no data"]
+
+
+def test_builds_after_the_first_finishes_run_again():
+    pool = BuildPool(enabled=False)
+    calls = []
+    for _ in range(2):
+        pool.run(('get_service_quality', 'France'), lambda: calls.append(1))
+    # Single-flight only joins builds in flight; repeats are the figure cache's job
+    assert len(calls) == 2 and pool.stats['coalesced'] == 0
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    pool = BuildPool(enabled=False)
+    build = Blocking()
+    leader = start(pool.run, ('get_global_revenue', '2024'), build)
+    assert build.started.wait(5)
+    assert pool.run(('get_global_revenue', '2023'), lambda: 'figure 2023') == 'figure 2023'
+    build.release.set()
+    leader.join(5)
@@ -0,0 +1,82 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+import db_service
+
+DATA_DIR = os.path.join(db_service.BASE_DIR, 'data')
+SAMPLE_CSV = os.path.join(DATA_DIR, 'ecommerce_dataset_10000.csv')
+sys.path.insert(0, DATA_DIR)
+from db_rollup import ROLLUP_TABLES
+
+
+def run_script(script, *args):
+    subprocess.run([sys.executable, script, *args], cwd=DATA_DIR, check=True, stdout=subprocess.DEVNULL)
+
+
+def table(conn, name):
+    df = pd.read_sql_query(f"SELECT * FROM {name}", conn)
+    return df.sort_values(list(df.columns), ignore_index=True)
+
+
+# A database built from the first 8,000 rows of the sample, then loaded with
+# --incremental from a file that repeats 1,000 of them (some changed) and adds
+# the last 2,000; and a copy of it with every rollup rebuilt from scratch
+@pytest.fixture(scope='module')
+def loaded(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp('incremental')
+    sample = pd.read_csv(SAMPLE_CSV)
+    base, delta = sample.iloc[:8000], sample.iloc[7000:].copy()
+
+    repeated = delta.index[:1000]
+    delta.loc[repeated[::10], 'quantity'] += 1                 # changed items
+    delta.loc[repeated[5::20], 'rating'] = 1                   # changed reviews
+    moved = delta.loc[repeated[7]]                             # a customer changes country
+    delta.loc[delta['customer_id'] == moved['customer_id'], 'country'] = 'India' if moved['country'] == 'Japan' else 'Japan'
+
+    base_csv, delta_csv = str(workdir / 'base.csv'), str(workdir / 'delta.csv')
+    base.to_csv(base_csv, index=False)
+    delta.to_csv(delta_csv, index=False)
+
+    db = str(workdir / 'incremental.db')
+    run_script('db_mod.py', '--csv', base_csv, '--db', db, '--no-snapshot')
+    run_script('db_mod.py', '--csv', delta_csv, '--db', db, '--incremental', '--no-snapshot')
+
+    rebuilt = str(workdir / 'rebuilt.db')
+    shutil.copy(db, rebuilt)
+    run_script('db_rollup.py', rebuilt)
+
+    with sqlite3.connect(db) as incremental, sqlite3.connect(rebuilt) as full:
+        yield incremental, full, sample
+
+
+def test_load_reaches_every_row(loaded):
+    incremental, _, sample = loaded
+    assert incremental.execute("SELECT COUNT(*) FROM Order_Items").fetchone()[0] == len(sample)
+    assert incremental.execute("SELECT COUNT(*) FROM Orders").fetchone()[0] == sample['order_id'].nunique()
+
+
+@pytest.mark.parametrize('name', ROLLUP_TABLES)
+def test_refreshed_rollups_equal_a_full_rebuild(loaded, name):
+    incremental, full, _ = loaded
+    pd.testing.assert_frame_equal(table(incremental, name), table(full, name), check_exact=False)
+
+
+def test_load_bumps_the_data_version(loaded):
+    incremental, _, sample = loaded
+    assert incremental.execute("SELECT MAX(version) FROM Data_Version").fetchone()[0] == 2
+    changes = set(incremental.execute("SELECT country, year, month FROM Data_Changes WHERE version = 2"))
+    assert changes
+
+    # Every (country, month) of the new rows is among the changed groups
+    new = sample.iloc[8000:]
+    dates = pd.to_datetime(new['order_date'])
+    customers = dict(incremental.execute("SELECT customer_id, country FROM Customers"))
+    added = {(customers[customer], year, month)
+             for customer, year, month in zip(new['customer_id'], dates.dt.year, dates.dt.month)}
+    assert added <= changes
@@ -0,0 +1,22 @@
+from metrics import BYTES_BUCKETS, SECONDS_BUCKETS, Histogram, render_metrics
+
+
+def test_bucket_bounds_keep_every_digit():
+    histogram = Histogram("payload_bytes", "Payload size.", "callback", BYTES_BUCKETS)
+    histogram.observe('update', 2_000_000)
+    lines = histogram.render()
+    assert 'payload_bytes_bucket{callback="update",le="1048576.0"} 0' in lines
+    assert 'payload_bytes_bucket{callback="update",le="4194304.0"} 1' in lines
+    # Every bound reads back as the bucket it came from
+    bounds = [line.split('le="')[1].split('"')[0] for line in lines if '_bucket' in line]
+    assert [float(bound) for bound in bounds[:-1]] == list(BYTES_BUCKETS)
+
+    seconds = Histogram("seconds", "Time.", "query", SECONDS_BUCKETS)
+    seconds.observe('q', 0.002)
+    assert 'seconds_bucket{query="q",le="0.001"} 0' in seconds.render()
+
+
+def test_totals_are_counters():
+    text = render_metrics({'dashboard_builds_in_flight': 0}, {'dashboard_builds_computed': 3})
+    assert "# TYPE dashboard_builds_in_flight gauge\ndashboard_builds_in_flight 0" in text
+    assert "# TYPE dashboard_builds_computed_total counter\ndashboard_builds_computed_total 3" in text
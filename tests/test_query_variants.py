@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+import pytest
+
+import db_service
+from db_service import query_filters, query_variant, read_query, validate_query
+
+QUERY = """SELECT country, SUM(revenue) AS revenue
+FROM Monthly_Sales
+WHERE TRUE
+    AND year = :year            -- if year
+    AND country = :country      -- if country
+GROUP BY country"""
+
+
+def test_optional_lines_are_kept_only_for_given_filters():
+    assert query_filters(QUERY) == ['country', 'year']
+
+    everything = query_variant(QUERY)
+    assert ':year' not in everything and ':country' not in everything
+    assert everything.splitlines() == ["SELECT country, SUM(revenue) AS revenue", "FROM Monthly_Sales",
+                                       "WHERE TRUE", "GROUP BY country"]
+
+    one_country = query_variant(QUERY, frozenset({'country'}))
+    assert "    AND country = :country" in one_country.splitlines()
+    assert ':year' not in one_country
+    # The marker comment goes with the line's filter
+    assert '-- if' not in query_variant(QUERY, frozenset({'country', 'year'}))
+
+
+def test_every_variant_of_every_query_compiles():
+    with db_service.borrow_connection() as conn:
+        for filename in sorted(os.listdir(db_service.sql_path)):
+            if filename.endswith('.sql'):
+                with open(os.path.join(db_service.sql_path, filename)) as file:
+                    validate_query(conn, file.read())
+
+
+# A filtered variant returns exactly the matching rows of the unfiltered one
+@pytest.mark.parametrize('year', [None, 2024])
+@pytest.mark.parametrize('country', [None, 'France'])
+def test_filtered_variant_matches_filtered_rows(year, country):
+    everything = read_query("get_customer_matrix.sql", year=None, country=None)
+    expected = everything
+    if year:
+        expected = expected[expected['full_date'].str.startswith(f"{year}-")]
+    if country:
+        expected = expected[expected['country'] == country]
+
+    actual = read_query("get_customer_matrix.sql", year=year, country=country)
+    assert not actual.empty
+    pd.testing.assert_frame_equal(actual, expected.reset_index(drop=True))
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+import db_service
+import visual
+from benchmarks.synthetic import build_database, use_database
+from timeseries import SERIES_POINT_BUDGET
+
+
+# Two decades of orders: the full-range chart is quarterly, a zoom of a few years monthly
+@pytest.fixture(scope='module')
+def long_history(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('synthetic') / 'long_history.db')
+    build_database(path, 20000, start='2005-01-01', end='2025-08-31')
+    previous = db_service.db_name
+    use_database(path)
+    yield path
+    use_database(previous)
+
+
+# Figures are plain dicts (see render.py)
+def trace_x(fig):
+    return [pd.to_datetime(pd.Series(trace['x'])) for trace in fig['data']]
+
+
+def x_title(fig):
+    return fig['layout']['xaxis']['title']['text']
+
+
+def test_full_range_is_quarterly(long_history):
+    assert visual._range_bucket() == 'quarter'
+    fig = visual.get_service_quality("All Countries")
+    assert x_title(fig) == "Time (Quarterly)"
+
+
+@pytest.mark.parametrize('country', ["All Countries", "France"])
+def test_zoom_to_months_keeps_one_point_per_date(long_history, country):
+    fig = visual.get_service_quality_zoomed(country, '2010-02-14', '2016-11-03')
+    assert x_title(fig) == "Time (Monthly in the zoomed range)"
+    for x in trace_x(fig):
+        assert x.is_unique
+        assert x.is_monotonic_increasing
+
+        # Monthly points inside the zoomed months, quarterly points outside them,
+        # each within the point budget
+        inside = x[(x >= '2010-02-01') & (x < '2016-12-01')]
+        outside = x[(x < '2010-02-01') | (x >= '2016-12-01')]
+        assert 4 < len(inside) <= SERIES_POINT_BUDGET
+        assert len(outside) <= SERIES_POINT_BUDGET
+        assert inside.dt.month.nunique() > 4
+        assert set(outside.dt.month) <= {1, 4, 7, 10}
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from timeseries import bucket_window, choose_bucket, downsample, lttb
+
+
+def series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'month': pd.date_range('2000-01-01', periods=n, freq='D'),
+                         'avg_shipping_days': rng.normal(size=n).cumsum(),
+                         'avg_review_score': rng.normal(size=n).cumsum()})
+
+
+def test_choose_bucket_is_the_finest_within_budget():
+    assert choose_bucket('2024-01-01', '2024-03-31', budget=120) == 'day'
+    assert choose_bucket('2024-01-01', '2024-12-31', budget=120) == 'week'
+    assert choose_bucket('2016-01-01', '2024-12-31', budget=120) == 'month'
+    assert choose_bucket('2000-01-01', '2024-12-31', budget=120) == 'quarter'
+    assert choose_bucket('2024-01-01', '2024-01-31', finest='month', budget=120) == 'month'
+
+
+def test_bucket_window_covers_whole_buckets():
+    assert bucket_window('2024-02-14', '2024-05-03', 'month') == ('2024-02-01', '2024-06-01')
+    # Weeks start on Monday
+    assert bucket_window('2024-05-08', '2024-05-08', 'week') == ('2024-05-06', '2024-05-13')
+
+
+def test_lttb_keeps_the_ends_and_the_budget():
+    df = series(1000)
+    picked = lttb(np.arange(1000), df['avg_shipping_days'], 50)
+    assert len(picked) == 50
+    assert picked[0] == 0 and picked[-1] == 999
+    assert (np.diff(picked) > 0).all()
+
+
+def test_lttb_never_picks_missing_values():
+    y = series(1000)['avg_review_score'].to_numpy(copy=True)
+    y[::7] = np.nan
+    picked = lttb(np.arange(1000), y, 50)
+    assert len(picked) <= 50
+    assert not np.isnan(y[picked]).any()
+
+
+def test_downsample_splits_the_budget_between_traces():
+    df = series(1000)
+    out = downsample(df, 'month', ['avg_shipping_days', 'avg_review_score'], budget=120)
+    assert len(out) <= 120
+    assert out['month'].is_unique and out['month'].is_monotonic_increasing
+    # A series within budget is left as it is
+    assert len(downsample(df.head(100), 'month', ['avg_shipping_days'], budget=120)) == 100
@@ -0,0 +1,25 @@
+import os
+import time
+
+import warmup as warmup_module
+from warmup import warmup
+
+
+def slow_figure():
+    time.sleep(0.2)
+
+
+# As under gunicorn --preload: the master starts the warm-up, then forks a worker
+def test_worker_forked_during_warmup_starts_warm(monkeypatch):
+    monkeypatch.setattr(warmup_module, 'filter_combinations', lambda years, countries: [(slow_figure, ())] * 2)
+    warmup.start([2024], ['France'], workers=1)
+    assert warmup.status()['state'] == 'running'
+
+    pid = os.fork()
+    if pid == 0:
+        status = warmup.status()
+        os._exit(0 if status['ready'] and status['done'] == 2 else 1)
+    _, code = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(code) == 0
+    # The master waited for the warm-up before forking
+    assert warmup.status()['state'] == 'finished'
@@ -0,0 +1,11 @@
+# --- CSS STYLES CONFIGURATION ---
+# Dashboard colors, used by the page layout (main.py) and the figure templates (render.py)
+THEME = {
+    'background': '#F0F2F5',
+    'card_bg': '#FFFFFF',
+    'primary': '#0052CC',
+    'text': '#172B4D',
+    'text_light': '#6B778C',
+    'border': '#DFE1E6',
+    'shadow': '0 4px 6px rgba(0, 0, 0, 0.1)'
+}
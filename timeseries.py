@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- TIME SERIES SIZE ---
+# Time charts aim for at most SERIES_POINT_BUDGET points per trace. Their time
+# bucket (day, week, month or quarter) is the finest one that covers the visible
+# range within the budget, and a trace that is still longer (decades of
+# quarters) is downsampled with LTTB, which keeps the points that shape the line.
+SERIES_POINT_BUDGET = int(os.environ.get("SERIES_POINT_BUDGET", "120"))
+
+# Average bucket length in days, finest first
+BUCKET_DAYS = {'day': 1, 'week': 7, 'month': 365.25 / 12, 'quarter': 365.25 / 4}
+# Buckets the monthly rollups (and the columnar store) answer: length in months
+BUCKET_MONTHS = {'month': 1, 'quarter': 3}
+BUCKET_NAMES = {'day': "Daily", 'week': "Weekly", 'month': "Monthly", 'quarter': "Quarterly"}
+# pandas period of each bucket; weeks start on Monday
+_PERIODS = {'day': 'D', 'week': 'W-SUN', 'month': 'M', 'quarter': 'Q'}
+
+
+# Finest bucket, not finer than `finest`, with at most `budget` buckets from start to end
+def choose_bucket(start, end, finest='day', budget=SERIES_POINT_BUDGET):
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+    buckets = list(BUCKET_DAYS)
+    for bucket in buckets[buckets.index(finest):]:
+        if days / BUCKET_DAYS[bucket] <= budget:
+            return bucket
+    return buckets[-1]
+
+
+# [start, end) widened to whole buckets, as 'YYYY-MM-DD' strings: zooms that
+# cover the same buckets read (and cache) the same window
+def bucket_window(start, end, bucket):
+    period = _PERIODS[bucket]
+    first = pd.Timestamp(start).to_period(period).start_time
+    last = pd.Timestamp(end).to_period(period).end_time.normalize() + pd.Timedelta(days=1)
+    return first.strftime('%Y-%m-%d'), last.strftime('%Y-%m-%d')
+
+
+# Largest-Triangle-Three-Buckets: indices of at most `threshold` points of (x, y),
+# always including the first and the last, that best preserve the shape of the
+# line. Points with a NaN y (a month without ratings) are never picked.
+def lttb(x, y, threshold=SERIES_POINT_BUDGET):
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) < len(y):
+        return valid[lttb(np.asarray(x)[valid], y[valid], threshold)]
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+
+    # threshold - 2 buckets between the first and the last point
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Third corner: the average of the next bucket (the last point after the last bucket)
+        following = slice(end, edges[i + 2]) if i + 2 < len(edges) else slice(n - 1, n)
+        avg_x, avg_y = x[following].mean(), y[following].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+# Rows of a time series frame kept by LTTB on each y column; the frame itself
+# when it fits the budget. The y columns share the rows (and the x array) and
+# each one is drawn as a trace, so they split the budget between them.
+def downsample(df, x, ys, budget=SERIES_POINT_BUDGET):
+    if len(df) <= budget:
+        return df
+    xs = pd.to_datetime(df[x]).to_numpy('datetime64[ns]').astype(np.int64)
+    share = budget // len(ys)
+    keep = np.unique(np.concatenate([lttb(xs, df[y].to_numpy(dtype=np.float64, na_value=np.nan), share)
+                                     for y in ys]))
+    return df.iloc[keep].reset_index(drop=True)
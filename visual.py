@@ -1,128 +1,162 @@
 # Library imports & Setup
-import plotly.express as px
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
 import pandas as pd
-from db_service import get_connection, extract_query_from_file
+import db_service
+from db_service import borrow_connection, db_fingerprint, read_query, DATA_BACKEND, COLUMNAR_BACKENDS
+from columnar import get_store
+from figure_cache import cached_figure
+from metrics import observe_query, timed_figure
+from classify import classify_performance, threshold_label, THRESHOLD_METHOD
+from timeseries import choose_bucket, bucket_window, downsample, BUCKET_DAYS, BUCKET_MONTHS, BUCKET_NAMES, SERIES_POINT_BUDGET
+from render import render_empty, render_global_revenue, render_customer_matrix, render_product_performance, render_service_quality
 
 # Global Variables (if any)
 
 # Global / Helper Functions (if any)
-def get_country_list():
-    conn = get_connection()
-    df = pd.read_sql_query("SELECT DISTINCT country FROM Customers;", conn)
-    conn.close()
 
-    options = ['All Countries']
-    for country in df['country']:
-        options.append(country)
-    return options
+# --- DROPDOWN OPTIONS ---
+# The year and country dropdowns list the values data/db_rollup.py stores in the
+# Filter_Options table. They are read on first use, not at import, and kept per
+# worker; every FILTER_OPTIONS_REFRESH seconds (0 = never) the database file is
+# checked and the options are read again if it changed. A database built before
+# Filter_Options existed falls back to scanning Orders and Customers.
+FILTER_OPTIONS_REFRESH = float(os.environ.get("FILTER_OPTIONS_REFRESH", "60"))
+
+
+# (years, countries) of the current database, newest year first
+def read_filter_options():
+    with observe_query("filter_options") as rows, borrow_connection() as conn:
+        try:
+            found = conn.execute("SELECT filter, value FROM Filter_Options ORDER BY filter, position").fetchall()
+            years = [value for (kind, value) in found if kind == 'year']
+            countries = [value for (kind, value) in found if kind == 'country']
+        except sqlite3.OperationalError:
+            years = [year for (year,) in conn.execute(
+                "SELECT DISTINCT CAST(order_year AS TEXT) FROM Orders ORDER BY order_year DESC")]
+            countries = [country for (country,) in conn.execute(
+                "SELECT DISTINCT country FROM Customers ORDER BY country")]
+        rows(len(years) + len(countries))
+    return years, countries
+
+
+class FilterOptions:
+    def __init__(self, refresh=FILTER_OPTIONS_REFRESH):
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._options = None
+        self._source = None      # (database path, file fingerprint) the options were read from
+        self._checked_at = 0.0
+
+    def get(self):
+        with self._lock:
+            now = time.monotonic()
+            if (self._options is not None and self._source[0] == db_service.db_name
+                    and (self.refresh <= 0 or now - self._checked_at < self.refresh)):
+                return self._options
+            self._checked_at = now
+            source = (db_service.db_name, db_fingerprint())
+            if source != self._source:
+                self._options = read_filter_options()
+                self._source = source
+            return self._options
+
+
+filter_options = FilterOptions()
 
-def get_year_list():
-    conn = get_connection()
-    df = pd.read_sql_query("SELECT DISTINCT strftime('%Y', order_date) as year FROM Orders ORDER BY year DESC;", conn)
-    conn.close()
 
-    options = []
-    for year in df['year']:
-        options.append(year)
-    return options
+def get_country_list():
+    return ['All Countries'] + filter_options.get()[1]
+
+def get_year_list():
+    return list(filter_options.get()[0])
+
+# (first day, last day) of the selected year, or of all years in the data
+def _date_range(selected_year=None):
+    years = [selected_year] if selected_year else filter_options.get()[0]
+    if not years:
+        return None
+    return f"{min(years)}-01-01", f"{max(years)}-12-31"
+
+# Bucket of a full-range time chart: monthly, or quarterly when the range is too
+# long for the point budget. Never finer than a month: the rollups are monthly.
+def _range_bucket(selected_year=None):
+    date_range = _date_range(selected_year)
+    return choose_bucket(*date_range, finest='month') if date_range else 'month'
+
+# Cache scopes: the (countries, years) of data behind each figure, None meaning
+# all. After an incremental load (data/db_mod.py --incremental) only cached
+# figures whose scope overlaps a changed (country, year) group are rebuilt.
+def _country_scope(selected_country):
+    return None if selected_country in (None, "All Countries") else {selected_country}
+
+def _revenue_scope(args):
+    # The latest year (no selection) may itself change, so it depends on every year
+    year = args['selected_year']
+    return None, ({int(year) - 1, int(year)} if year else None)
+
+def _matrix_scope(args):
+    year = args['selected_year']
+    return _country_scope(args['selected_country']), ({int(year)} if year else None)
+
+def _country_only_scope(args):
+    return _country_scope(args['selected_country']), None
+
+# Run a sql/ query, or answer it from the columnar store when DASHBOARD_BACKEND
+# is memory or arrow and a `memory` function is given (the store holds months:
+# day and week buckets always come from SQLite). Filters set to None are left
+# out of the query. Returns None if the query file could not be read.
+def fetch_data(filename, memory=None, **filters):
+    if DATA_BACKEND in COLUMNAR_BACKENDS and memory is not None:
+        with observe_query(filename) as rows:
+            df = memory(get_store())
+            rows(len(df))
+        return df
+
+    return read_query(filename, **filters)
 
 # Visualization Functions for Tab 1: Strategy Tab
 
 # Visualize of Global Revenue Map (Choropleth)
 
+@cached_figure(scope=_revenue_scope)
+@timed_figure
 def get_global_revenue(selected_year=None):
-    # 1. Connect & Fetch ALL Data
-    conn = get_connection()
-    query = extract_query_from_file("get_global_revenue.sql")
-    
-    if query is None:
-        return go.Figure()
+    # 1. Connect & Fetch the selected year (latest year if None), with the
+    # previous year's revenue already joined in by SQL
+    sql_year = int(selected_year) if selected_year else None
+    df = fetch_data("get_global_revenue.sql", year=sql_year,
+                    memory=lambda store: store.global_revenue(sql_year))
 
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    if df is None:
+        return render_empty("")
 
     if df.empty:
-        return go.Figure().update_layout(title="No Data Found")
+        return render_empty(f"No Data for {selected_year}" if selected_year else "No Data Found")
 
-    # --- 2. CALCULATE YEAR-OVER-YEAR GROWTH ---
-    
-    # Sort data to ensure shift works correctly
-    df = df.sort_values(by=['country', 'year'])
-
-    # Shift to get previous year's revenue
-    df['prev_revenue'] = df.groupby('country')['total_revenue'].shift(1)
+    selected_year = df['year'].iloc[0]
 
-    # Calculate Growth %
+    # --- 2. CALCULATE YEAR-OVER-YEAR GROWTH ---
     df['yoy_growth'] = ((df['total_revenue'] - df['prev_revenue']) / df['prev_revenue']) * 100
 
     # --- FORMATTING GROWTH LABEL (HTML Styling) ---
-    def format_growth_html(x):
-        if pd.isna(x):
-            return "-" # First year or N/A
-        elif x > 0:
-            # Green Up Arrow
-            return f"<span style='color:green;'>▲</span> +{x:.1f}%"
-        elif x < 0:
-            # Red Down Arrow
-            return f"<span style='color:red;'>▼</span> {x:.1f}%"
-        else:
-            # Equal (0% change)
-            return "-"
-
-    df['growth_label'] = df['yoy_growth'].apply(format_growth_html)
-
-    # --- 3. FILTER FOR SELECTED YEAR ---
-    if selected_year:
-        target_year = str(selected_year)
-        df_plot = df[df['year'] == target_year].copy()
-    else:
-        # Default to latest year
-        latest_year = df['year'].max()
-        df_plot = df[df['year'] == latest_year].copy()
-        selected_year = latest_year
-
-    if df_plot.empty:
-        return go.Figure().update_layout(title=f"No Data for {selected_year}")
-
-    # --- 4. CREATE VISUALIZATION ---
-    fig = px.scatter_geo(
-        df_plot,
-        locations="country",
-        locationmode="country names",
-        color="total_revenue",
-        size="total_revenue",
-        hover_name="country",
-        projection="natural earth",
-        title=f"Revenue Map ({selected_year})",
-        template="plotly_white",
-        color_continuous_scale=px.colors.sequential.Blues,
-        
-        # Add 'growth_label' to custom_data (Index 3)
-        custom_data=['total_revenue', 'avg_basket_size', 'avg_delivery_time', 'growth_label']
+    # Green up arrow / red down arrow; "-" for the first year, N/A or 0% change
+    growth = df['yoy_growth'].to_numpy(dtype=float, na_value=np.nan)
+    percent = np.char.mod('%.1f', growth)
+    df['growth_label'] = np.select(
+        [growth > 0, growth < 0],
+        [np.char.add(np.char.add("<span style='color:green;'>▲</span> +", percent), "%"),
+         np.char.add(np.char.add("<span style='color:red;'>▼</span> ", percent), "%")],
+        default="-",
     )
 
-    # Update Tooltip with HTML support
-    fig.update_traces(
-        hovertemplate="<b>%{hovertext}</b><br>" +
-                      "<i>Growth: %{customdata[3]}</i><br><br>" + # Shows colored arrow
-                      "Total Revenue: $%{customdata[0]:,.0f}<br>" +
-                      "Avg. Basket Size: $%{customdata[1]:,.0f}<br>" +
-                      "Avg. Delivery Time: %{customdata[2]:.1f} days<extra></extra>"
-    )
-    
-    # Ensure Hover Background is White
-    fig.update_layout(
-        hoverlabel=dict(
-            bgcolor="white",
-            font_size=14,
-            font_family="Arial"
-        ),
-        coloraxis_colorbar=dict(title="Revenue ($)")
-    )
-
-    return fig
+    # --- 3. CREATE VISUALIZATION ---
+    # Styled figure skeleton with this year's data spliced in (see render.py)
+    return render_global_revenue(df, f"Revenue Map ({selected_year})")
 
 # Visualize of Customer Value Matrix (Scatter Plot)
 
@@ -130,187 +164,113 @@ def get_global_revenue(selected_year=None):
 # Visualization Functions for Tab 2: Operation Tab
 
 #
-def get_customer_matrix_plot(selected_year=None, selected_country="All Countries", return_kpis=False):
-    # 1. Connect
-    conn = get_connection()
-    query = extract_query_from_file("get_customer_matrix.sql")
-    
-    if query is None:
-        return go.Figure().update_layout(title="SQL Query not found.")
+CUSTOMER_MATRIX_FILES = {'month': "get_customer_matrix.sql", 'quarter': "get_customer_matrix_quarterly.sql"}
 
-    # 2. Prepare Parameters for SQL
-    # If selected_year is None, we pass None to SQL (activating the "IS NULL" logic)
-    # We convert to string just in case, to match the SQL strftime format
-    sql_year = str(selected_year) if selected_year else None
+@cached_figure(scope=_matrix_scope)
+@timed_figure
+def get_customer_matrix_plot(selected_year=None, selected_country="All Countries", return_kpis=False):
+    # 1. Prepare Filters for SQL
+    # A filter left as None is dropped from the query (all years / all countries)
+    sql_year = int(selected_year) if selected_year else None
     
     # Handle "All Countries" logic
     sql_country = selected_country if selected_country != "All Countries" else None
 
-    # We pass the parameters twice each because the SQL uses them twice:
-    # (? IS NULL OR Year = ?) AND (? IS NULL OR Country = ?)
-    params = (sql_year, sql_year, sql_country, sql_country)
+    # 2. Execute Query with Filters on a pooled connection, by month, or by
+    # quarter when the range is too long for the point budget (see timeseries.py)
+    bucket = _range_bucket(selected_year)
+    months = BUCKET_MONTHS[bucket]
+    df = fetch_data(CUSTOMER_MATRIX_FILES[bucket], year=sql_year, country=sql_country,
+                    memory=lambda store: store.customer_matrix(sql_year, sql_country, months))
 
-    # 3. Execute Query with Parameters
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
+    if df is None:
+        return render_empty("SQL Query not found.")
 
     # Safety: Handle empty results
     if df.empty:
-        return go.Figure().update_layout(title=f"No data for {selected_country} in {selected_year or 'All Years'}")
+        return render_empty(f"No data for {selected_country} in {selected_year or 'All Years'}")
 
-    # 4. Post-Processing
+    # 3. Post-Processing
     # Since SQL now gives us a proper 'YYYY-MM-01' string, we just convert it directly.
     # No more manual string concatenation needed!
     df['full_date'] = pd.to_datetime(df['full_date'])
+    # One trace per country: keep each within the point budget
+    if df['country'].value_counts().max() > SERIES_POINT_BUDGET:
+        df = pd.concat([downsample(group, 'full_date', ['total_spent'])
+                        for _, group in df.groupby('country', sort=False)], ignore_index=True)
 
-    # 5. Visualization
-    fig = px.line(
-        df,
-        x='full_date',
-        y='total_spent',
-        color='country',
-        markers=True,
-        title=f"Customer Monthly Total Spend ({selected_year if selected_year else 'All Time'})",
-        template="plotly_white",
-        custom_data=['country', 'full_date', 'total_spent']
-    )
-
-    # Tooltip Styling
-    fig.update_traces(
-        hovertemplate="<b>Country:</b> %{customdata[0]}<br>"
-                      "<b>Date:</b> %{x|%B %Y}<br>"
-                      "<b>Total Spent:</b> $%{y:,.2f}<extra></extra>"
-    )
-
-    # Layout
-    fig.update_layout(
-        xaxis_title='Month',
-        yaxis_title='Total Spent ($)',
-        xaxis=dict(type='date', dtick="M1", tickformat="%b %Y"),
-        hoverlabel=dict(bgcolor='white'),
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-
-    return fig
+    # 4. Visualization
+    return render_customer_matrix(df, f"Customer {BUCKET_NAMES[bucket]} Total Spend ({selected_year if selected_year else 'All Time'})")
 
 # Visualize of Product Issues Pareto (Bar + Line)
-def get_product_performance(selected_country = "All Countries"):
-    # Get DB Connection
-    conn = get_connection()
-    
-    # Extract SQL Query
-    query = extract_query_from_file("get_product_performance.sql")
-    if query is None:
-        return None  # Exit if query could not be read
-    # Parameterize Query
-    if selected_country == "All Countries":
-        # Execute Query and Fetch Data
-        params = (None, None)
-    else:
-        params = (selected_country, selected_country)
+# level="category" shows one bar per category, level="product" drills down to product_id
+PRODUCT_LEVELS = {
+    'category': ("get_product_performance.sql", 'category', "Product Category"),
+    'product': ("get_product_drilldown.sql", 'product_id', "Product"),
+}
+
+@cached_figure(scope=_country_only_scope)
+@timed_figure
+def get_product_performance(selected_country = "All Countries", level="category", threshold_method=THRESHOLD_METHOD):
+    # Filter the Query: None reads all countries
+    sql_country = selected_country if selected_country != "All Countries" else None
 
-    df = pd.read_sql_query(query, conn, params=params)
-    
-    # Close Connection
-    conn.close()
+    filename, x_column, x_title = PRODUCT_LEVELS[level]
+
+    # Fetch Data on a pooled connection (or from the in-memory store)
+    df = fetch_data(filename, country=sql_country,
+                    memory=lambda store: store.product_performance(sql_country, level))
+    if df is None:
+        return render_empty("SQL Query not found.")  # Exit if query could not be read
 
     if df.empty:
         print("No data available for the selected country.")
-        return go.Figure().update_layout(title="No data available for the selected country.")
+        return render_empty("No data available for the selected country.")
     
     # Graph Notation Logic Section
     # --------------------------
-    avg_sales_volume = df['total_sales_volume'].mean()
-    avg_rating = df['average_customer_rating'].mean()
-
-    color_conditions = []
-    annotations = []
-
-    for index, row in df.iterrows():
-        if row['total_sales_volume'] < avg_sales_volume and row['average_customer_rating'] < avg_rating:
-            color_conditions.append('#FF8C00')  # Red Color Added
-            annotations.append('Action Needed')
-        else:
-            color_conditions.append('#1976D2')  # Blue Color Added
-            annotations.append('')
-    
-    # Visualization Part
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
-
-    # Bar Chart -- Total Sales Volume
-    fig.add_trace(
-        go.Bar(
-            x = df['category'],
-            y = df['total_sales_volume'],
-            name = 'Total Sales Volume',
-            marker_color=color_conditions,
-            text=annotations,
-            textposition='inside',
-            insidetextanchor='start',
-            yaxis = 'y1'
-        ),
-        secondary_y = False,
-    )
-
-    # Line Chart -- Average Customer Rating
-    fig.add_trace(
-        go.Scatter(
-            x = df['category'],
-            y = df['average_customer_rating'],
-            name = 'Average Customer Rating',
-            marker_color='blue',
-            yaxis = 'y2'
-        ),
-        secondary_y = True,
-    )
-
-    fig.add_hline(
-        y = avg_sales_volume,
-        line_dash="dot",
-        annotation_text="Avg Sales Volume",
-        line_color="green"
-    )
+    # Flag rows below the threshold on both sales volume and rating (see classify.py)
+    colors, annotations, volume_threshold = classify_performance(
+        df['total_sales_volume'], df['average_customer_rating'], threshold_method)
 
-    # Layout Adjustments
-    fig.update_layout(
-        title_text = "Product Performance Analysis",
-    )
-
-    fig.update_xaxes(title_text="Product Category")
-    fig.update_yaxes(title_text="Total Sales Volume", secondary_y=False, autorange=True)
-    fig.update_yaxes(title_text="Average Customer Rating (1-5)", secondary_y=True, autorange=True)
-
-    # Update title
+    # Visualization Part
     current_country = selected_country if selected_country else "All Countries"
-    fig.update_layout(title_text=f"Product Performance Analysis - {current_country}")
-
-    return fig
+    return render_product_performance(df, colors, annotations, volume_threshold,
+                                      f"Product Performance Analysis - {current_country}",
+                                      x_column=x_column, x_title=x_title,
+                                      threshold_text=f"{threshold_label(threshold_method)} Sales Volume")
 
 # Visualize of Service Quality Over Time (Line Chart)
 # Visualize Service Quality Trend (Line + Line)
-def get_service_quality(selected_country = "All Countries"):
-    # Get DB Connection
-    conn = get_connection()
-    
-    # Extract SQL Query
-    query = extract_query_from_file("get_service_quality.sql")
-    if query is None:
-        return None  # Exit if query could not be read
-    # Parameterize Query
-    if selected_country == "All Countries":
-        # Execute Query and Fetch Data
-        params = (None, None)
+SERVICE_QUALITY_FILES = {'month': "get_service_quality.sql", 'quarter': "get_service_quality_quarterly.sql"}
+SERVICE_QUALITY_COLUMNS = ['avg_shipping_days', 'avg_review_score']
+
+# Service quality by `bucket`, within the point budget, over the dates in
+# `window` ([start, end) as 'YYYY-MM-DD' strings, None for all dates): month and
+# quarter buckets from the rollups or the in-memory store, day and week buckets
+# from Daily_Orders. None if the query file could not be read.
+def _service_quality_frame(sql_country, bucket, window=None):
+    if bucket in BUCKET_MONTHS:
+        df = fetch_data(SERVICE_QUALITY_FILES[bucket], country=sql_country,
+                        memory=lambda store: store.service_quality(sql_country, BUCKET_MONTHS[bucket]))
+        if df is not None and window is not None:
+            # Bucket labels are their first day, so string comparison selects whole buckets
+            start, end = window
+            df = df[(df['month'] >= start) & (df['month'] < end)].reset_index(drop=True)
     else:
-        params = (selected_country, selected_country)
+        start, end = (pd.Timestamp(day) for day in window)
+        df = fetch_data("get_service_quality_detail.sql", country=sql_country, bucket=bucket,
+                        start_year=start.year, start_month=start.month, start_day=start.day,
+                        end_year=end.year, end_month=end.month, end_day=end.day)
+    return df if df is None else downsample(df, 'month', SERVICE_QUALITY_COLUMNS)
 
-    df = pd.read_sql_query(query, conn, params=params)
-    
-    # Close Connection
-    conn.close()
+def _service_quality_figure(df, selected_country, x_title):
+    if df is None:
+        return render_empty("SQL Query not found.")  # Exit if query could not be read
 
     if df.empty:
         print("No data available for the selected country.")
-        return go.Figure().update_layout(title="No data available for the selected country.")
+        return render_empty("No data available for the selected country.")
 
     # Convert month column to datetime for plotting
     df['month'] = pd.to_datetime(df['month'])
@@ -319,60 +279,52 @@ def get_service_quality(selected_country = "All Countries"):
     # Visualization Part
     # --------------------------
 
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
-
-    # Line 1 -- Avg Shipping Days
-    fig.add_trace(
-        go.Scatter(
-            x = df['month'],
-            y = df['avg_shipping_days'],
-            name = 'Avg Shipping Days',
-            marker_color='orange',
-            mode='lines+markers',
-            yaxis='y1'
-        ),
-        secondary_y = False,
-    )
-
-    # Line 2 -- Avg Review Score
-    fig.add_trace(
-        go.Scatter(
-            x = df['month'],
-            y = df['avg_review_score'],
-            name = 'Avg Review Score',
-            marker_color='blue',
-            mode='lines+markers',
-            yaxis='y2'
-        ),
-        secondary_y = True,
-    )
-
     current_country = selected_country if selected_country else "All Countries"
+    return render_service_quality(df, f"Service Quality Trend: Shipping Time vs Customer Satisfaction - {current_country}",
+                                  x_title)
 
-    # Layout Adjustments
-    fig.update_layout(
-        title_text = f"Service Quality Trend: Shipping Time vs Customer Satisfaction - {current_country}",
-        hovermode='x unified'
-    )
-
-    # X-axis
-    fig.update_xaxes(
-        title_text="Time (Monthly)",
-        rangeslider=dict(visible=True),
-        type='date'
-    )
-
-    # Left Y-axis
-    fig.update_yaxes(
-        title_text="Avg Shipping Days",
-        secondary_y=False
-    )
+@cached_figure(scope=_country_only_scope)
+@timed_figure
+def get_service_quality(selected_country = "All Countries"):
+    # Filter the Query: None reads all countries
+    sql_country = selected_country if selected_country != "All Countries" else None
 
-    # Right Y-axis
-    fig.update_yaxes(
-        title_text="Avg Review Score (1-5)",
-        secondary_y=True,
-        range=[0, 5.5]
-    )
+    # Fetch Data on a pooled connection (or from the in-memory store), by month,
+    # or by quarter when the history is too long for the point budget
+    bucket = _range_bucket()
+    df = _service_quality_frame(sql_country, bucket)
+    return _service_quality_figure(df, selected_country, f"Time ({BUCKET_NAMES[bucket]})")
+
+# The service quality chart zoomed in to [start, end] (the x axis range it
+# reports): the zoomed dates by day or by week, whichever fits the point budget,
+# between the full-range points outside them, so the rangeslider still shows the
+# whole history. No zoom (None), or one too wide for a finer bucket, gets the
+# full-range figure.
+def get_service_quality_zoomed(selected_country, start=None, end=None):
+    if start is None or end is None:
+        return get_service_quality(selected_country)
+    bucket = choose_bucket(start, end)
+    if BUCKET_DAYS[bucket] >= BUCKET_DAYS[_range_bucket()]:
+        return get_service_quality(selected_country)
+    return get_service_quality_window(selected_country, bucket, *bucket_window(start, end, bucket))
+
+# Zooms covering the same buckets share a window, and its cached figure
+@cached_figure(scope=_country_only_scope)
+@timed_figure
+def get_service_quality_window(selected_country, bucket, start, end):
+    sql_country = selected_country if selected_country != "All Countries" else None
 
-    return fig
\ No newline at end of file
+    full_bucket = _range_bucket()
+    full = _service_quality_frame(sql_country, full_bucket)
+    try:
+        zoomed = _service_quality_frame(sql_country, bucket, (start, end))
+    except sqlite3.OperationalError as e:
+        # e.g. a database built before Daily_Orders: keep the full-range chart
+        print(f"Error: Could not read the zoomed service quality: {e}")
+        zoomed = None
+    if full is None or zoomed is None:
+        return _service_quality_figure(full, selected_country, f"Time ({BUCKET_NAMES[full_bucket]})")
+
+    outside = full[(full['month'] < start) | (full['month'] >= end)]
+    df = pd.concat([outside, zoomed], ignore_index=True).sort_values('month', ignore_index=True)
+    return _service_quality_figure(df, selected_country, f"Time ({BUCKET_NAMES[bucket]} in the zoomed range)")
\ No newline at end of file
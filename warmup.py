@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from visual import get_global_revenue, get_customer_matrix_plot, get_product_performance, get_service_quality, PRODUCT_LEVELS
+from visual import get_year_list, get_country_list
+
+# --- WARM-UP SETTINGS ---
+# DASH_WARMUP=1 warms the figure cache when wsgi.py is imported by gunicorn
+WARMUP_ENABLED = os.environ.get("DASH_WARMUP", "") not in ("", "0")
+WARMUP_WORKERS = int(os.environ.get("DASH_WARMUP_WORKERS", "4"))
+
+
+# Every (builder, args) pair the dashboard callbacks can request
+def filter_combinations(year_options, country_options):
+    # Tab 2 also sends None when the country dropdown is cleared
+    tab2_countries = [None] + list(country_options)
+
+    jobs = []
+    for year in year_options:
+        jobs.append((get_global_revenue, (year,)))
+        for country in country_options:
+            jobs.append((get_customer_matrix_plot, (year, country)))
+    for country in tab2_countries:
+        for level in PRODUCT_LEVELS:
+            jobs.append((get_product_performance, (country, level)))
+        jobs.append((get_service_quality, (country,)))
+    return jobs
+
+
+# Pre-computes every filter combination in a background thread pool and
+# reports progress for the /ready endpoint.
+class Warmup:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self.state = 'idle'
+        self.total = 0
+        self.done = 0
+        self.errors = 0
+        self.seconds = None
+
+    @property
+    def ready(self):
+        # A worker that never warms is ready straight away
+        return self.state in ('idle', 'finished')
+
+    def _run_job(self, job):
+        func, args = job
+        try:
+            func(*args)
+        except Exception as e:
+            print(f"Warm-up failed for {func.__name__}{args}: {e}")
+            with self._lock:
+                self.errors += 1
+        with self._lock:
+            self.done += 1
+
+    def _run(self, jobs, workers):
+        started = time.perf_counter()
+        if jobs is None:
+            # Counted like a failed figure: the worker still finishes and becomes
+            # ready, and the callbacks read the options again on demand
+            try:
+                jobs = filter_combinations(get_year_list(), get_country_list())
+            except Exception as e:
+                print(f"Warm-up failed to read the dropdown options: {e}")
+                jobs = []
+                with self._lock:
+                    self.errors += 1
+            with self._lock:
+                self.total = len(jobs)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='warmup') as executor:
+            list(executor.map(self._run_job, jobs))
+        with self._lock:
+            self.seconds = round(time.perf_counter() - started, 3)
+            self.state = 'finished'
+        print(f"Warm-up finished: {self.done} figures in {self.seconds}s ({self.errors} errors)")
+
+    # Without options, the current dropdown options are read in the warm-up thread
+    def start(self, year_options=None, country_options=None, workers=WARMUP_WORKERS, wait=False):
+        jobs = None
+        if year_options is not None and country_options is not None:
+            jobs = filter_combinations(year_options, country_options)
+        with self._lock:
+            if self.state == 'running':
+                return
+            self.state = 'running'
+            self.total = len(jobs) if jobs is not None else 0
+            self.done = 0
+            self.errors = 0
+
+        thread = self._thread = threading.Thread(target=self._run, args=(jobs, workers), name='warmup', daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+
+    # gunicorn --preload imports wsgi.py, and so starts the warm-up, in the master.
+    # A thread does not survive fork(), and the locks it holds (the warm-up's, the
+    # figure caches') would stay locked in the worker, so the master finishes the
+    # warm-up before forking: every worker starts warm, with state='finished'.
+    # Without --preload each worker runs its own warm-up and never forks.
+    def _before_fork(self):
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def status(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'state': self.state,
+                'total': self.total,
+                'done': self.done,
+                'errors': self.errors,
+                'seconds': self.seconds,
+            }
+
+
+warmup = Warmup()
+os.register_at_fork(before=warmup._before_fork)
@@ -1,3 +1,10 @@
 from main import app
+from warmup import warmup, WARMUP_ENABLED
 
-server = app.server
\ No newline at end of file
+server = app.server
+
+# DASH_WARMUP=1: fill the figure cache in the background; /ready returns 503 until done
+# With gunicorn --preload this runs in the master, which forks the workers once
+# the warm-up is done (see Warmup._before_fork); without it, every worker warms itself
+if WARMUP_ENABLED:
+    warmup.start()